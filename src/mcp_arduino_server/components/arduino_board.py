@@ -50,7 +50,8 @@ class ArduinoBoard(MCPMixin):
 
             log.info("Listing connected boards")
 
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 cmd,
                 capture_output=True,
                 text=True,
@@ -136,7 +137,8 @@ Common troubleshooting steps:
 
             log.info(f"Searching for boards: {query}")
 
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 cmd,
                 capture_output=True,
                 text=True,
@@ -340,7 +342,8 @@ Common troubleshooting steps:
 
             log.info("Listing installed cores")
 
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 cmd,
                 capture_output=True,
                 text=True,
@@ -543,7 +546,8 @@ Common troubleshooting steps:
                     "board", "listall", "esp32"
                 ]
 
-                list_result = subprocess.run(
+                list_result = await asyncio.to_thread(
+                    subprocess.run,
                     list_cmd,
                     capture_output=True,
                     text=True,
@@ -612,7 +616,8 @@ Common troubleshooting steps:
             log.info("Updating core index")
 
             # First update the index
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 cmd,
                 capture_output=True,
                 text=True,
@@ -633,7 +638,8 @@ Common troubleshooting steps:
 
             log.info("Upgrading all cores")
 
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 cmd,
                 capture_output=True,
                 text=True,
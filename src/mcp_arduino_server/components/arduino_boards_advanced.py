@@ -3,6 +3,7 @@ Advanced Arduino Board Management Component
 Provides board details, discovery, and attachment features
 """
 
+import asyncio
 import json
 import logging
 import subprocess
@@ -35,7 +36,8 @@ class ArduinoBoardsAdvanced(MCPMixin):
                 if '--json' not in args and '--format' not in ' '.join(args):
                     cmd.append('--json')
 
-                result = subprocess.run(
+                result = await asyncio.to_thread(
+                    subprocess.run,
                     cmd,
                     capture_output=True,
                     text=True,
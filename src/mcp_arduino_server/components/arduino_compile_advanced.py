@@ -3,6 +3,7 @@ Advanced Arduino Compilation Component
 Provides advanced compile options, build analysis, and cache management
 """
 
+import asyncio
 import json
 import logging
 import os
@@ -40,7 +41,8 @@ class ArduinoCompileAdvanced(MCPMixin):
                     if args[0] in ["compile", "upload", "board", "lib", "core", "config"]:
                         cmd.append('--json')
 
-                result = subprocess.run(
+                result = await asyncio.to_thread(
+                    subprocess.run,
                     cmd,
                     capture_output=True,
                     text=True,
@@ -313,7 +315,8 @@ class ArduinoCompileAdvanced(MCPMixin):
             size_cmd = ["size", "-A", str(elf_file)]
 
         try:
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 size_cmd,
                 capture_output=True,
                 text=True,
@@ -3,6 +3,7 @@ Advanced Arduino Library Management Component
 Provides dependency checking, version management, and library operations
 """
 
+import asyncio
 import json
 import logging
 import os
@@ -37,7 +38,8 @@ class ArduinoLibrariesAdvanced(MCPMixin):
                 if '--json' not in args:
                     cmd.append('--json')
 
-                result = subprocess.run(
+                result = await asyncio.to_thread(
+                    subprocess.run,
                     cmd,
                     capture_output=True,
                     text=True,
@@ -1,8 +1,11 @@
 """Arduino Library management component"""
 import asyncio
+import importlib.util
 import json
 import logging
 import subprocess
+import time
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
@@ -13,6 +16,19 @@ from pydantic import BaseModel, Field
 
 log = logging.getLogger(__name__)
 
+# Seconds to reuse 'lib list' output while the libraries directory is unchanged
+_INSTALLED_CACHE_TTL = 1.0
+
+
+@lru_cache(maxsize=1)
+def _load_fuzz():
+    """Import thefuzz on first fuzzy match; most sessions never need it"""
+    try:
+        from thefuzz import fuzz
+    except ImportError:
+        return None
+    return fuzz
+
 
 class LibrarySearchRequest(BaseModel):
     """Request model for library search"""
@@ -28,15 +44,14 @@ class ArduinoLibrary(MCPMixin):
         self.config = config
         self.arduino_cli_path = config.arduino_cli_path
         self.arduino_user_dir = config.arduino_user_dir
-
-        # Try to import fuzzy search if available
-        try:
-            from thefuzz import fuzz
-            self.fuzz = fuzz
-            self.fuzzy_available = True
-        except ImportError:
-            self.fuzz = None
-            self.fuzzy_available = False
+        # (monotonic timestamp, libraries dir mtime, installed libraries)
+        self._installed_cache: tuple[float, float | None, list[dict[str, Any]]] | None = None
+
+        # Check for fuzzy search without importing it; _load_fuzz does that
+        # on first use
+        self.fuzz = None
+        self.fuzzy_available = importlib.util.find_spec("thefuzz") is not None
+        if not self.fuzzy_available:
             log.warning("thefuzz not available - fuzzy search disabled")
 
     @mcp_resource(uri="arduino://libraries")
@@ -88,7 +103,8 @@ class ArduinoLibrary(MCPMixin):
 
             log.info(f"Searching libraries: {request.query}")
 
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 cmd,
                 capture_output=True,
                 text=True,
@@ -227,6 +243,7 @@ class ArduinoLibrary(MCPMixin):
 
             # Wait for process to complete
             await process.wait()
+            self._installed_cache = None
 
             stdout = '\n'.join(stdout_data)
             stderr = '\n'.join(stderr_data)
@@ -294,12 +311,14 @@ class ArduinoLibrary(MCPMixin):
 
             log.info(f"Uninstalling library: {library_name}")
 
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 cmd,
                 capture_output=True,
                 text=True,
                 timeout=self.config.command_timeout
             )
+            self._installed_cache = None
 
             if result.returncode == 0:
                 return {
@@ -350,12 +369,15 @@ class ArduinoLibrary(MCPMixin):
                     break
 
             # Fuzzy search if exact match not found and fuzzy search available
+            fuzz = None
             if not library_dir and self.fuzzy_available:
+                fuzz = self.fuzz or _load_fuzz()
+            if fuzz:
                 best_match = None
                 best_score = 0
                 for item in libraries_dir.iterdir():
                     if item.is_dir():
-                        score = self.fuzz.ratio(library_name.lower(), item.name.lower())
+                        score = fuzz.ratio(library_name.lower(), item.name.lower())
                         if score > best_score and score >= self.config.fuzzy_search_threshold:
                             best_score = score
                             best_match = item
@@ -403,6 +425,17 @@ class ArduinoLibrary(MCPMixin):
 
     async def _get_installed_libraries(self) -> list[dict[str, Any]]:
         """Get list of installed libraries"""
+        # arduino-cli is a separate Go process per call; reuse a result that
+        # is fresh and whose libraries directory has not changed since
+        try:
+            mtime = (self.arduino_user_dir / "libraries").stat().st_mtime
+        except OSError:
+            mtime = None
+        cached = self._installed_cache
+        if (cached and cached[1] == mtime
+                and time.monotonic() - cached[0] < _INSTALLED_CACHE_TTL):
+            return cached[2]
+
         try:
             cmd = [
                 self.arduino_cli_path,
@@ -410,7 +443,8 @@ class ArduinoLibrary(MCPMixin):
                 "--format", "json"
             ]
 
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 cmd,
                 capture_output=True,
                 text=True,
@@ -419,7 +453,9 @@ class ArduinoLibrary(MCPMixin):
 
             if result.returncode == 0:
                 data = json.loads(result.stdout)
-                return data.get('installed_libraries', [])
+                libraries = data.get('installed_libraries', [])
+                self._installed_cache = (time.monotonic(), mtime, libraries)
+                return libraries
             return []
 
         except Exception as e:
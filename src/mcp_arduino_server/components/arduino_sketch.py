@@ -1,4 +1,5 @@
 """Arduino Sketch management component"""
+import asyncio
 import logging
 import os
 import subprocess
@@ -94,7 +95,7 @@ void loop() {{
             ino_file.write_text(boilerplate)
 
             # Try to open in default editor
-            self._open_file(ino_file)
+            await asyncio.to_thread(self._open_file, ino_file)
 
             log.info(f"Created sketch: {sketch_dir}")
 
@@ -202,7 +203,8 @@ void loop() {{
             log.info(f"Compiling sketch: {' '.join(cmd)}")
 
             # Run compilation
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 cmd,
                 capture_output=True,
                 text=True,
@@ -270,7 +272,8 @@ void loop() {{
             log.info(f"Uploading sketch: {' '.join(cmd)}")
 
             # Run upload
-            result = subprocess.run(
+            result = await asyncio.to_thread(
+                subprocess.run,
                 cmd,
                 capture_output=True,
                 text=True,
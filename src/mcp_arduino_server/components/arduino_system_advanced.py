@@ -3,6 +3,7 @@ Advanced Arduino System Management Component
 Provides config management, bootloader operations, and sketch utilities
 """
 
+import asyncio
 import json
 import logging
 import os
@@ -34,7 +35,8 @@ class ArduinoSystemAdvanced(MCPMixin):
 
         try:
             if capture_output:
-                result = subprocess.run(
+                result = await asyncio.to_thread(
+                    subprocess.run,
                     cmd,
                     capture_output=True,
                     text=True,
@@ -6,15 +6,58 @@ It exposes what the client actually declared during initialization, not just wha
 """
 
 import logging
+import weakref
 from typing import Any
 
 from fastmcp import Context
 from fastmcp.contrib.mcp_mixin import MCPMixin, mcp_tool
-from mcp.types import ToolAnnotations
+from mcp.types import (
+    ClientCapabilities,
+    RootsCapability,
+    SamplingCapability,
+    ToolAnnotations,
+)
 from pydantic import Field
 
 logger = logging.getLogger(__name__)
 
+# Capabilities that only carry a listChanged flag
+_SIMPLE_CAPS = ("resources", "prompts", "tools")
+
+# Tool parameter defaults, shared by every schema build
+_VERBOSE_FIELD = Field(False, description="Show raw capability data")
+_CAPABILITY_FIELD = Field(..., description="Capability to check: sampling, roots")
+
+# Capability probes passed to session.check_client_capability, built once at import
+_CAP_OBJECTS = {
+    "sampling": ClientCapabilities(sampling=SamplingCapability()),
+    "roots": ClientCapabilities(roots=RootsCapability()),
+}
+
+
+def _declared_from_caps(caps: ClientCapabilities) -> dict[str, Any]:
+    """Summarize a ClientCapabilities model as {capability: {"declared": ..., ...}}"""
+    # Dump once in pydantic-core instead of probing each field from Python
+    dump = caps.model_dump()
+    declared_caps = {}
+
+    sampling = dump.get("sampling")
+    declared_caps["sampling"] = {
+        "declared": sampling is not None,
+        "details": sampling
+    }
+
+    # Roots and the remaining capabilities only carry a listChanged flag
+    for attr in ("roots", *_SIMPLE_CAPS):
+        cap = dump.get(attr)
+        declared_caps[attr] = {
+            "declared": True,
+            "listChanged": cap.get("listChanged", False)
+        } if isinstance(cap, dict) else {"declared": cap is not None}
+
+    declared_caps["experimental"] = dump.get("experimental") or {}
+    return declared_caps
+
 
 class ClientCapabilitiesInfo(MCPMixin):
     """
@@ -26,6 +69,27 @@ class ClientCapabilitiesInfo(MCPMixin):
     def __init__(self, config):
         """Initialize capabilities info component"""
         self.config = config
+        # Declared capabilities per session; client params are fixed after the handshake
+        self._snapshots: weakref.WeakKeyDictionary[Any, dict[str, Any]] = weakref.WeakKeyDictionary()
+
+    def _snapshot(self, ctx: Context) -> dict[str, Any]:
+        """Declared capabilities for the ctx session, computed once per session"""
+        session = getattr(ctx, 'session', None)
+        caps = getattr(getattr(session, '_client_params', None), 'capabilities', None)
+        if caps is None:
+            return {}
+
+        try:
+            return self._snapshots[session]
+        except KeyError:
+            pass
+        except TypeError:
+            # Session can't be weakly referenced - compute without caching
+            return _declared_from_caps(caps)
+
+        declared_caps = _declared_from_caps(caps)
+        self._snapshots[session] = declared_caps
+        return declared_caps
 
     @mcp_tool(
         name="client_declared_capabilities",
@@ -39,7 +103,7 @@ class ClientCapabilitiesInfo(MCPMixin):
     async def show_declared_capabilities(
         self,
         ctx: Context,
-        verbose: bool = Field(False, description="Show raw capability data")
+        verbose: bool = _VERBOSE_FIELD
     ) -> dict[str, Any]:
         """
         Show the actual capabilities the client declared in the initialization handshake.
@@ -70,49 +134,7 @@ class ClientCapabilitiesInfo(MCPMixin):
             if hasattr(client_params, 'capabilities'):
                 caps = client_params.capabilities
 
-                # Check sampling capability
-                if hasattr(caps, 'sampling'):
-                    sampling_cap = caps.sampling
-                    result["declared_capabilities"]["sampling"] = {
-                        "declared": sampling_cap is not None,
-                        "details": str(sampling_cap) if sampling_cap else None
-                    }
-                else:
-                    result["declared_capabilities"]["sampling"] = {
-                        "declared": False,
-                        "details": "Not declared"
-                    }
-
-                # Check roots capability
-                if hasattr(caps, 'roots'):
-                    roots_cap = caps.roots
-                    if roots_cap:
-                        result["declared_capabilities"]["roots"] = {
-                            "declared": True,
-                            "listChanged": getattr(roots_cap, 'listChanged', False)
-                        }
-                    else:
-                        result["declared_capabilities"]["roots"] = {
-                            "declared": False
-                        }
-
-                # Check other capabilities
-                for attr in ['resources', 'prompts', 'tools']:
-                    if hasattr(caps, attr):
-                        cap = getattr(caps, attr)
-                        if cap:
-                            result["declared_capabilities"][attr] = {
-                                "declared": True,
-                                "listChanged": getattr(cap, 'listChanged', False) if cap else False
-                            }
-                        else:
-                            result["declared_capabilities"][attr] = {
-                                "declared": False
-                            }
-
-                # Check experimental capabilities
-                if hasattr(caps, 'experimental'):
-                    result["declared_capabilities"]["experimental"] = caps.experimental or {}
+                result["declared_capabilities"] = self._snapshot(ctx)
 
                 if verbose:
                     result["raw_capabilities"] = str(caps)
@@ -169,7 +191,7 @@ class ClientCapabilitiesInfo(MCPMixin):
     async def check_capability(
         self,
         ctx: Context,
-        capability: str = Field(..., description="Capability to check: sampling, roots, resources, prompts, tools")
+        capability: str = _CAPABILITY_FIELD
     ) -> dict[str, Any]:
         """
         Check if the client declared a specific capability.
@@ -188,16 +210,14 @@ class ClientCapabilitiesInfo(MCPMixin):
 
         # Try to use the check_client_capability method directly
         if hasattr(session, 'check_client_capability'):
-            from mcp.types import ClientCapabilities, RootsCapability, SamplingCapability
-
-            # Build the capability object to check
-            check_cap = ClientCapabilities()
-
-            if capability == "sampling":
-                check_cap.sampling = SamplingCapability()
-            elif capability == "roots":
-                check_cap.roots = RootsCapability()
-            # Add other capabilities as needed
+            check_cap = _CAP_OBJECTS.get(capability)
+            if check_cap is None:
+                return {
+                    "capability": capability,
+                    "supported": False,
+                    "error": f"Unsupported capability name: {capability} "
+                             f"(expected one of: {', '.join(_CAP_OBJECTS)})"
+                }
 
             try:
                 supported = session.check_client_capability(check_cap)
@@ -233,12 +253,12 @@ class ClientCapabilitiesInfo(MCPMixin):
         """Analyze capability issues and suggest fixes"""
 
         # First get the declared capabilities
-        caps_result = await self.show_declared_capabilities(ctx, verbose=False)
+        declared_caps = self._snapshot(ctx)
 
         fixes = []
 
         # Check sampling
-        sampling = caps_result.get("declared_capabilities", {}).get("sampling", {})
+        sampling = declared_caps.get("sampling", {})
         if not sampling.get("declared"):
             fixes.append({
                 "issue": "Sampling not declared by client",
@@ -248,7 +268,7 @@ class ClientCapabilitiesInfo(MCPMixin):
             })
 
         # Check roots
-        roots = caps_result.get("declared_capabilities", {}).get("roots", {})
+        roots = declared_caps.get("roots", {})
         if roots.get("declared") and not roots.get("listChanged"):
             fixes.append({
                 "issue": "Roots supported but not dynamic updates",
@@ -259,7 +279,7 @@ class ClientCapabilitiesInfo(MCPMixin):
 
         # Check for other missing capabilities
         for cap in ["resources", "prompts", "tools"]:
-            cap_info = caps_result.get("declared_capabilities", {}).get(cap, {})
+            cap_info = declared_caps.get(cap, {})
             if not cap_info.get("declared"):
                 fixes.append({
                     "issue": f"{cap.capitalize()} capability not declared",
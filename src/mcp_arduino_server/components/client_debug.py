@@ -6,17 +6,62 @@ including capabilities, features, and current state. Essential for troubleshooti
 understanding what features are available.
 """
 
+import asyncio
+import inspect
 import logging
+import time
+import weakref
 from datetime import datetime
 from typing import Any
 
 from fastmcp import Context
 from fastmcp.contrib.mcp_mixin import MCPMixin, mcp_tool
-from mcp.types import ToolAnnotations
+from mcp.types import SamplingMessage, TextContent, ToolAnnotations
 from pydantic import Field
 
 logger = logging.getLogger(__name__)
 
+# Flush batched capability log lines once this many are pending or this much time has passed
+_LOG_FLUSH_SIZE = 16
+_LOG_FLUSH_INTERVAL = 1.0
+
+# Most distinct test prompts remembered per session by client_test_sampling
+_SAMPLE_CACHE_MAX_PROMPTS = 32
+
+# Tool parameter defaults, shared by every schema build
+_VERBOSE_FIELD = Field(False, description="Show detailed technical information")
+_TEST_PROMPT_FIELD = Field("Say 'Hello MCP' in exactly 3 words", description="Simple test prompt")
+
+# Stringified ctx.sample signatures, keyed by the unbound function on the context class
+_sig_cache: dict[Any, str] = {}
+
+# Feature matrix icons, indexed by bool(supported)
+_ICONS = ("❌", "✅")
+
+# Context class -> (class name, repr of class)
+_CTX_TYPE_CACHE: dict[type, tuple[str, str]] = {}
+
+
+def _ctx_type_info(ctx: Any) -> tuple[str, str]:
+    """Return the cached (name, repr) pair for the context's class"""
+    t = type(ctx)
+    cached = _CTX_TYPE_CACHE.get(t)
+    if cached is None:
+        cached = (t.__name__, str(t))
+        _CTX_TYPE_CACHE[t] = cached
+    return cached
+
+
+async def _count_listing(list_fn: Any) -> int | None:
+    """Await a context listing method and count its items, or None if unavailable"""
+    if list_fn is None:
+        return None
+    try:
+        items = await list_fn()
+    except Exception:
+        return None
+    return len(items) if items else 0
+
 
 class ClientDebugInfo(MCPMixin):
     """
@@ -32,17 +77,35 @@ class ClientDebugInfo(MCPMixin):
     def __init__(self, config):
         """Initialize debug component"""
         self.config = config
+        self._connection_dt = datetime.now()
         self.client_info = {
-            "connection_time": datetime.now().isoformat(),
+            "connection_time": self._connection_dt.isoformat(),
             "capabilities_detected": {},
             "runtime_features": {},
             "test_results": {}
         }
+        self._pending_log: list[tuple[str, Any]] = []
+        self._last_flush = time.monotonic()
+        # session -> {prompt: (monotonic timestamp, successful test_sampling result)}
+        self._sample_cache: weakref.WeakKeyDictionary[Any, dict[str, tuple[float, dict[str, Any]]]] = (
+            weakref.WeakKeyDictionary()
+        )
 
     def update_capability(self, name: str, value: Any):
         """Update a detected capability"""
         self.client_info["capabilities_detected"][name] = value
-        logger.info(f"Client capability detected: {name} = {value}")
+        self._pending_log.append((name, value))
+        if (len(self._pending_log) >= _LOG_FLUSH_SIZE
+                or time.monotonic() - self._last_flush > _LOG_FLUSH_INTERVAL):
+            self._flush_log()
+
+    def _flush_log(self):
+        """Emit pending capability updates as a single log record"""
+        self._last_flush = time.monotonic()
+        if not self._pending_log:
+            return
+        logger.info("Client capabilities detected: %s", dict(self._pending_log))
+        self._pending_log.clear()
 
     @mcp_tool(
         name="client_debug_info",
@@ -56,7 +119,7 @@ class ClientDebugInfo(MCPMixin):
     async def debug_info(
         self,
         ctx: Context,
-        verbose: bool = Field(False, description="Show detailed technical information")
+        verbose: bool = _VERBOSE_FIELD
     ) -> dict[str, Any]:
         """
         Get comprehensive debug information about the connected MCP client.
@@ -143,17 +206,18 @@ class ClientDebugInfo(MCPMixin):
         }
 
         if verbose:
+            public_attrs = [attr for attr in dir(ctx) if not attr.startswith('_')]
             debug_report["technical_details"] = {
-                "context_type": str(type(ctx)),
-                "context_dir": [attr for attr in dir(ctx) if not attr.startswith('_')],
+                "context_type": _ctx_type_info(ctx)[1],
+                "context_dir": public_attrs,
                 "context_methods": {
                     attr: callable(getattr(ctx, attr))
-                    for attr in dir(ctx)
-                    if not attr.startswith('_')
+                    for attr in public_attrs
                 },
                 "raw_capabilities": self.client_info.get("capabilities_detected", {})
             }
 
+        self._flush_log()
         return debug_report
 
     async def _check_sampling_support(self, ctx: Context) -> dict[str, Any]:
@@ -168,21 +232,28 @@ class ClientDebugInfo(MCPMixin):
         }
 
         # Check if method exists
-        if hasattr(ctx, 'sample'):
+        sample = getattr(ctx, 'sample', None)
+        if sample is not None:
             sampling_info["method_exists"] = True
 
             # Check if it's callable
-            if callable(ctx.sample):
+            if callable(sample):
                 sampling_info["callable"] = True
                 sampling_info["supported"] = True
 
                 # Try to get method signature if possible
-                try:
-                    import inspect
-                    sig = inspect.signature(ctx.sample)
-                    sampling_info["signature"] = str(sig)
-                except:
-                    pass
+                key = getattr(type(ctx), 'sample', None)
+                sig = _sig_cache.get(key)
+                if sig is None:
+                    try:
+                        sig = str(inspect.signature(sample))
+                    except (ValueError, TypeError):
+                        pass  # Some callables don't expose a signature
+                    else:
+                        if key is not None:
+                            _sig_cache[key] = sig
+                if sig is not None:
+                    sampling_info["signature"] = sig
 
                 # We could try a test sampling, but that might be expensive
                 sampling_info["test_result"] = "Available (not tested to avoid cost)"
@@ -246,25 +317,25 @@ class ClientDebugInfo(MCPMixin):
             "error": None
         }
 
-        # Check for list_resources
-        if hasattr(ctx, 'list_resources'):
-            resources_info["method_exists"] = True
+        list_resources = getattr(ctx, 'list_resources', None)
+        list_templates = getattr(ctx, 'list_resource_templates', None)
+        resources_info["method_exists"] = list_resources is not None
 
-            try:
-                # Some servers might expose resources
-                resources = await ctx.list_resources()
-                resources_info["supported"] = True
-                resources_info["resource_count"] = len(resources) if resources else 0
-            except:
-                pass
-
-        # Check for list_resource_templates
-        if hasattr(ctx, 'list_resource_templates'):
-            try:
-                templates = await ctx.list_resource_templates()
-                resources_info["templates_count"] = len(templates) if templates else 0
-            except:
-                pass
+        # Nothing to ask for - skip the round-trips entirely
+        if list_resources is None and list_templates is None:
+            return resources_info
+
+        # Issue both listings concurrently instead of back to back
+        resource_count, templates_count = await asyncio.gather(
+            _count_listing(list_resources),
+            _count_listing(list_templates)
+        )
+
+        if resource_count is not None:
+            resources_info["supported"] = True
+            resources_info["resource_count"] = resource_count
+        if templates_count is not None:
+            resources_info["templates_count"] = templates_count
 
         return resources_info
 
@@ -301,7 +372,7 @@ class ClientDebugInfo(MCPMixin):
         tests = {
             "roots_retrieval": "not_tested",
             "sampling_available": "not_tested",
-            "context_type": str(type(ctx).__name__)
+            "context_type": _ctx_type_info(ctx)[0]
         }
 
         # Test roots retrieval
@@ -313,7 +384,7 @@ class ClientDebugInfo(MCPMixin):
             tests["roots_retrieval"] = f"failed: {str(e)[:50]}"
 
         # Test sampling (without actually calling it to avoid costs)
-        if hasattr(ctx, 'sample') and callable(ctx.sample):
+        if callable(getattr(ctx, 'sample', None)):
             tests["sampling_available"] = "available"
         else:
             tests["sampling_available"] = "not_available"
@@ -323,22 +394,18 @@ class ClientDebugInfo(MCPMixin):
     def _calculate_session_duration(self) -> str:
         """Calculate how long the session has been active"""
 
-        try:
-            start = datetime.fromisoformat(self.client_info["connection_time"])
-            duration = datetime.now() - start
+        duration = datetime.now() - self._connection_dt
 
-            hours = duration.seconds // 3600
-            minutes = (duration.seconds % 3600) // 60
-            seconds = duration.seconds % 60
+        hours = duration.seconds // 3600
+        minutes = (duration.seconds % 3600) // 60
+        seconds = duration.seconds % 60
 
-            if hours > 0:
-                return f"{hours}h {minutes}m {seconds}s"
-            elif minutes > 0:
-                return f"{minutes}m {seconds}s"
-            else:
-                return f"{seconds}s"
-        except:
-            return "unknown"
+        if hours > 0:
+            return f"{hours}h {minutes}m {seconds}s"
+        elif minutes > 0:
+            return f"{minutes}m {seconds}s"
+        else:
+            return f"{seconds}s"
 
     def _generate_recommendations(
         self,
@@ -391,17 +458,14 @@ class ClientDebugInfo(MCPMixin):
     ) -> dict[str, str]:
         """Create a feature support matrix"""
 
-        def status_icon(supported: bool) -> str:
-            return "✅" if supported else "❌"
-
         return {
-            "AI Completion (sampling)": status_icon(sampling_info.get("supported", False)),
-            "Workspace Roots": status_icon(roots_info.get("supported", False)),
-            "Resources": status_icon(resources_info.get("supported", False)),
-            "Dynamic Tools": status_icon(notification_support.get("tools.listChanged", False)),
-            "Dynamic Resources": status_icon(notification_support.get("resources.listChanged", False)),
-            "Dynamic Prompts": status_icon(notification_support.get("prompts.listChanged", False)),
-            "Dynamic Roots": status_icon(notification_support.get("roots.listChanged", False))
+            "AI Completion (sampling)": _ICONS[bool(sampling_info.get("supported", False))],
+            "Workspace Roots": _ICONS[bool(roots_info.get("supported", False))],
+            "Resources": _ICONS[bool(resources_info.get("supported", False))],
+            "Dynamic Tools": _ICONS[bool(notification_support.get("tools.listChanged", False))],
+            "Dynamic Resources": _ICONS[bool(notification_support.get("resources.listChanged", False))],
+            "Dynamic Prompts": _ICONS[bool(notification_support.get("prompts.listChanged", False))],
+            "Dynamic Roots": _ICONS[bool(notification_support.get("roots.listChanged", False))]
         }
 
 
@@ -417,24 +481,34 @@ class ClientDebugInfo(MCPMixin):
     async def test_sampling(
         self,
         ctx: Context,
-        test_prompt: str = Field("Say 'Hello MCP' in exactly 3 words", description="Simple test prompt")
+        test_prompt: str = _TEST_PROMPT_FIELD
     ) -> dict[str, Any]:
         """Test client sampling with a simple, low-cost prompt"""
 
-        if not hasattr(ctx, 'sample'):
+        sample = getattr(ctx, 'sample', None)
+        if sample is None:
             return {
                 "success": False,
                 "error": "Sampling not available - ctx.sample method not found"
             }
 
-        if not callable(ctx.sample):
+        if not callable(sample):
             return {
                 "success": False,
                 "error": "ctx.sample exists but is not callable"
             }
 
         try:
-            from mcp.types import SamplingMessage, TextContent
+            # Reuse a recent successful probe rather than paying for another LLM round-trip
+            ttl = self.config.sampling_test_cache_ttl
+            try:
+                session_cache = self._sample_cache.setdefault(ctx.session, {})
+            except TypeError:
+                # Session can't be weakly referenced - probe without caching
+                session_cache = None
+            cached = session_cache.get(test_prompt) if session_cache is not None else None
+            if cached and time.monotonic() - cached[0] < ttl:
+                return {**cached[1], "cached": True}
 
             messages = [
                 SamplingMessage(
@@ -444,18 +518,27 @@ class ClientDebugInfo(MCPMixin):
             ]
 
             # Try minimal sampling call
-            result = await ctx.sample(
+            result = await sample(
                 messages=messages,
                 max_tokens=20  # Very small to minimize cost
             )
 
-            return {
+            response = {
                 "success": True,
                 "test_prompt": test_prompt,
                 "response": result.content if result else "No response",
                 "response_type": type(result).__name__ if result else "None",
                 "sampling_works": True
             }
+            if session_cache is not None:
+                now = time.monotonic()
+                # Drop expired probes so the cache only holds live results
+                for prompt in [p for p, (ts, _) in session_cache.items() if now - ts >= ttl]:
+                    del session_cache[prompt]
+                if len(session_cache) >= _SAMPLE_CACHE_MAX_PROMPTS:
+                    del session_cache[next(iter(session_cache))]
+                session_cache[test_prompt] = (now, response)
+            return response
 
         except Exception as e:
             return {
@@ -5,7 +5,8 @@ Handles serial port connections, monitoring, and communication
 
 import asyncio
 import logging
-import time
+import re
+from collections import deque
 from collections.abc import Callable
 from dataclasses import dataclass, field
 from datetime import datetime
@@ -15,20 +16,31 @@ import serial
 import serial.tools.list_ports
 
 try:
-    import serial_asyncio
+    # Prefer the pyserial-asyncio-fast fork: fewer event-loop wakeups per read
+    import serial_asyncio_fast as serial_asyncio
 except ImportError:
-    # Fall back to serial.aio if serial_asyncio not available
     try:
-        from serial import aio as serial_asyncio
+        import serial_asyncio
     except ImportError:
-        # Create a dummy module for testing without serial
-        class DummySerialAsyncio:
-            async def create_serial_connection(*args, **kwargs):
-                raise NotImplementedError("pyserial-asyncio not installed")
-        serial_asyncio = DummySerialAsyncio()
+        # Fall back to serial.aio if serial_asyncio not available
+        try:
+            from serial import aio as serial_asyncio
+        except ImportError:
+            # Create a dummy module for testing without serial
+            class DummySerialAsyncio:
+                async def create_serial_connection(*args, **kwargs):
+                    raise NotImplementedError("pyserial-asyncio not installed")
+            serial_asyncio = DummySerialAsyncio()
 
 logger = logging.getLogger(__name__)
 
+# Common Arduino VIDs and description/manufacturer keywords
+_ARDUINO_VIDS = frozenset({0x2341, 0x2a03, 0x1a86, 0x0403, 0x10c4})
+_ARDUINO_RE = re.compile(r"arduino|genuino|esp32|esp8266|ch340|ft232|cp210", re.IGNORECASE)
+
+# Lowercase markers that end a send_command response
+_END_MARKERS = ("ok", "error", "done", "ready")
+
 
 class ConnectionState(Enum):
     """Serial connection states"""
@@ -39,7 +51,7 @@ class ConnectionState(Enum):
     BUSY = "busy"  # Being used by another operation (e.g., upload)
 
 
-@dataclass
+@dataclass(slots=True)
 class SerialPortInfo:
     """Information about a serial port"""
     device: str
@@ -71,18 +83,14 @@ class SerialPortInfo:
 
     def is_arduino_compatible(self) -> bool:
         """Check if this appears to be an Arduino-compatible device"""
-        # Common Arduino VID/PIDs
-        arduino_vids = [0x2341, 0x2a03, 0x1a86, 0x0403, 0x10c4]
-        if self.vid in arduino_vids:
+        if self.vid in _ARDUINO_VIDS:
             return True
 
         # Check description/manufacturer
-        arduino_keywords = ["arduino", "genuino", "esp32", "esp8266", "ch340", "ft232", "cp210"]
-        check_str = f"{self.description} {self.manufacturer} {self.product}".lower()
-        return any(keyword in check_str for keyword in arduino_keywords)
+        return _ARDUINO_RE.search(f"{self.description} {self.manufacturer} {self.product}") is not None
 
 
-@dataclass
+@dataclass(slots=True)
 class SerialConnection:
     """Represents a serial connection"""
     port: str
@@ -102,41 +110,94 @@ class SerialConnection:
     last_activity: datetime | None = None
     error_message: str | None = None
     listeners: set[Callable] = field(default_factory=set)
-    buffer: list[str] = field(default_factory=list)
+    # Immutable (listener, is_coroutine) view of listeners, rebuilt on add/remove
+    _listener_snapshot: tuple[tuple[Callable, bool], ...] = field(default=(), init=False, repr=False)
+    buffer: deque[tuple[datetime, str]] = field(init=False)
     max_buffer_size: int = 1000
+    # Lines waiting for coroutine listeners; past the high-water mark new lines skip them
+    _dispatch_backlog: deque[str] = field(default_factory=deque, init=False, repr=False)
+    _dispatch_task: asyncio.Task | None = field(default=None, init=False, repr=False)
+    _dropping: bool = field(default=False, init=False, repr=False)
+    dropped_lines: int = field(default=0, init=False)
+    dispatch_drained: asyncio.Event = field(default_factory=asyncio.Event, init=False, repr=False)
+    # Queues from subscribe(); each gets None once the connection stops delivering lines
+    _line_queues: set[asyncio.Queue] = field(default_factory=set, init=False, repr=False)
+
+    def __post_init__(self):
+        # Ring buffer: the deque drops the oldest line itself once full
+        self.buffer = deque(maxlen=self.max_buffer_size)
+        self.dispatch_drained.set()
 
     async def readline(self) -> str | None:
         """Read a line from the serial port"""
         if self.reader and self.state == ConnectionState.CONNECTED:
             try:
                 data = await self.reader.readline()
-                line = data.decode('utf-8', errors='ignore').strip()
-                self.last_activity = datetime.now()
-
-                # Add to buffer
-                self.buffer.append(f"[{datetime.now().isoformat()}] {line}")
-                if len(self.buffer) > self.max_buffer_size:
-                    self.buffer.pop(0)
-
-                # Notify listeners
-                for listener in self.listeners:
-                    if asyncio.iscoroutinefunction(listener):
-                        await listener(line)
+                # Trim on the bytes so only the final line is decoded (UTF-8 has an ASCII fast path)
+                line = data.strip().decode('utf-8', errors='ignore')
+                now = datetime.now()
+                self.last_activity = now
+
+                # Add to buffer; timestamps are formatted on read
+                self.buffer.append((now, line))
+
+                # Notify listeners: sync ones inline, coroutine ones from the dispatch backlog
+                has_coroutines = False
+                for listener, is_coroutine in self._listener_snapshot:
+                    if is_coroutine:
+                        has_coroutines = True
                     else:
                         listener(line)
+                if has_coroutines:
+                    self._queue_dispatch(line)
 
                 return line
             except Exception as e:
                 logger.error(f"Error reading from {self.port}: {e}")
                 self.error_message = str(e)
                 self.state = ConnectionState.ERROR
+                self.close_line_queues()
         return None
 
+    def _queue_dispatch(self, line: str) -> None:
+        """Queue a line for coroutine listeners, dropping it if they have fallen too far behind"""
+        if len(self._dispatch_backlog) >= self.max_buffer_size * 0.9:
+            if not self._dropping:
+                logger.warning(f"Listeners on {self.port} can't keep up, dropping lines until they catch up")
+                self._dropping = True
+            self.dropped_lines += 1
+            return
+
+        self._dispatch_backlog.append(line)
+        self.dispatch_drained.clear()
+        if self._dispatch_task is None or self._dispatch_task.done():
+            self._dispatch_task = asyncio.create_task(self._dispatch_loop())
+
+    async def _dispatch_loop(self) -> None:
+        """Feed backlogged lines to coroutine listeners, all listeners concurrently per line"""
+        while self._dispatch_backlog:
+            line = self._dispatch_backlog.popleft()
+            pending = [
+                listener(line)
+                for listener, is_coroutine in self._listener_snapshot
+                if is_coroutine
+            ]
+            for result in await asyncio.gather(*pending, return_exceptions=True):
+                if isinstance(result, Exception):
+                    logger.error(f"Listener error on {self.port}: {result}")
+
+        self._dropping = False
+        self.dispatch_drained.set()
+
     async def write(self, data: str) -> bool:
         """Write data to the serial port"""
+        return await self.write_bytes(data.encode('utf-8'))
+
+    async def write_bytes(self, data: bytes) -> bool:
+        """Write already-encoded data to the serial port"""
         if self.writer and self.state == ConnectionState.CONNECTED:
             try:
-                self.writer.write(data.encode('utf-8'))
+                self.writer.write(data)
                 await self.writer.drain()
                 self.last_activity = datetime.now()
                 return True
@@ -144,6 +205,7 @@ class SerialConnection:
                 logger.error(f"Error writing to {self.port}: {e}")
                 self.error_message = str(e)
                 self.state = ConnectionState.ERROR
+                self.close_line_queues()
         return False
 
     async def writeline(self, line: str) -> bool:
@@ -155,16 +217,42 @@ class SerialConnection:
     def add_listener(self, callback: Callable) -> None:
         """Add a listener for incoming data"""
         self.listeners.add(callback)
+        self._refresh_listener_snapshot()
 
     def remove_listener(self, callback: Callable) -> None:
         """Remove a listener"""
         self.listeners.discard(callback)
+        self._refresh_listener_snapshot()
+
+    def subscribe(self) -> asyncio.Queue:
+        """Return a queue that receives each incoming line, then None when the connection stops"""
+        queue: asyncio.Queue[str | None] = asyncio.Queue()
+        self._line_queues.add(queue)
+        self.add_listener(queue.put_nowait)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        """Stop delivering lines to a queue from subscribe()"""
+        self._line_queues.discard(queue)
+        self.remove_listener(queue.put_nowait)
+
+    def close_line_queues(self) -> None:
+        """Wake every subscribed queue with the None end marker"""
+        for queue in self._line_queues:
+            queue.put_nowait(None)
+
+    def _refresh_listener_snapshot(self) -> None:
+        """Rebuild the tuple readline() iterates over"""
+        self._listener_snapshot = tuple(
+            (listener, asyncio.iscoroutinefunction(listener)) for listener in self.listeners
+        )
 
     def get_buffer_content(self, last_n_lines: int | None = None) -> list[str]:
         """Get buffered content"""
+        entries = list(self.buffer)
         if last_n_lines:
-            return self.buffer[-last_n_lines:]
-        return self.buffer.copy()
+            entries = entries[-last_n_lines:]
+        return [f"[{ts.isoformat()}] {line}" for ts, line in entries]
 
     def clear_buffer(self) -> None:
         """Clear the buffer"""
@@ -182,6 +270,8 @@ class SerialConnectionManager:
         self._lock = asyncio.Lock()
         self._running = False
         self._discovery_task: asyncio.Task | None = None
+        # Port info from the most recent scan, refreshed by list_ports()
+        self._known_port_info: dict[str, SerialPortInfo] = {}
 
     async def start(self):
         """Start the connection manager"""
@@ -210,9 +300,12 @@ class SerialConnectionManager:
 
     async def list_ports(self) -> list[SerialPortInfo]:
         """List all available serial ports"""
-        ports = []
-        for port_info in serial.tools.list_ports.comports():
-            ports.append(SerialPortInfo.from_list_ports_info(port_info))
+        # comports() walks sysfs/udev (or SetupDi on Windows); keep it off the event loop
+        port_infos = await asyncio.get_running_loop().run_in_executor(
+            None, serial.tools.list_ports.comports
+        )
+        ports = [SerialPortInfo.from_list_ports_info(port_info) for port_info in port_infos]
+        self._known_port_info = {p.device: p for p in ports}
         return ports
 
     async def list_arduino_ports(self) -> list[SerialPortInfo]:
@@ -269,12 +362,11 @@ class SerialConnectionManager:
                 # Try to reconnect
                 await self._disconnect_internal(port)
 
-            # Get port info
-            port_info = None
-            for info in await self.list_ports():
-                if info.device == port:
-                    port_info = info
-                    break
+            # Get port info, scanning only if discovery hasn't seen the port yet
+            port_info = self._known_port_info.get(port)
+            if port_info is None:
+                await self.list_ports()
+                port_info = self._known_port_info.get(port)
 
             # Create connection with all parameters
             conn = SerialConnection(
@@ -309,6 +401,15 @@ class SerialConnectionManager:
 
                 conn.reader = reader
                 conn.writer = writer
+
+                # Drop the USB-serial latency timer (16ms by default on Linux FTDI/CDC)
+                ser = getattr(writer.transport, 'serial', None)
+                if ser is not None and hasattr(ser, 'set_low_latency_mode'):
+                    try:
+                        ser.set_low_latency_mode(True)
+                    except (OSError, ValueError, NotImplementedError) as e:
+                        logger.debug(f"Low latency mode not available on {port}: {e}")
+
                 conn.state = ConnectionState.CONNECTED
                 conn.last_activity = datetime.now()
 
@@ -346,13 +447,25 @@ class SerialConnectionManager:
                 pass
             del self.monitoring_tasks[port]
 
-        # Close connection
+        # Stop feeding backlogged lines to listeners
         conn = self.connections[port]
+        conn._dispatch_backlog.clear()
+        if conn._dispatch_task is not None:
+            conn._dispatch_task.cancel()
+            try:
+                await conn._dispatch_task
+            except asyncio.CancelledError:
+                pass
+            conn._dispatch_task = None
+        conn.dispatch_drained.set()
+
+        # Close connection
         if conn.writer:
             conn.writer.close()
             await conn.writer.wait_closed()
 
         conn.state = ConnectionState.DISCONNECTED
+        conn.close_line_queues()
         del self.connections[port]
 
         logger.info(f"Disconnected from {port}")
@@ -420,32 +533,33 @@ class SerialConnectionManager:
 
     async def _port_discovery_loop(self):
         """Periodically discover new/removed ports"""
-        known_ports = set()
+        known_ports: frozenset[str] = frozenset()
 
         while self._running:
             try:
-                current_ports = set()
-                for port_info in serial.tools.list_ports.comports():
-                    current_ports.add(port_info.device)
-
-                # Detect new ports
-                new_ports = current_ports - known_ports
-                if new_ports:
-                    logger.info(f"New serial ports detected: {new_ports}")
-                    # Could emit an event or callback here
-
-                # Detect removed ports
-                removed_ports = known_ports - current_ports
-                if removed_ports:
-                    logger.info(f"Serial ports removed: {removed_ports}")
-                    # Auto-cleanup disconnected ports
-                    for port in removed_ports:
-                        if port in self.connections:
-                            conn = self.connections[port]
-                            if conn.state != ConnectionState.BUSY:
-                                await self.disconnect(port)
-
-                known_ports = current_ports
+                await self.list_ports()
+                current_ports = frozenset(self._known_port_info)
+
+                # Steady state (no hot-plug): nothing to diff or clean up
+                if current_ports != known_ports:
+                    # Detect new ports
+                    new_ports = current_ports - known_ports
+                    if new_ports:
+                        logger.info(f"New serial ports detected: {set(new_ports)}")
+                        # Could emit an event or callback here
+
+                    # Detect removed ports
+                    removed_ports = known_ports - current_ports
+                    if removed_ports:
+                        logger.info(f"Serial ports removed: {set(removed_ports)}")
+                        # Auto-cleanup disconnected ports
+                        for port in removed_ports:
+                            if port in self.connections:
+                                conn = self.connections[port]
+                                if conn.state != ConnectionState.BUSY:
+                                    await self.disconnect(port)
+
+                    known_ports = current_ports
 
             except Exception as e:
                 logger.error(f"Port discovery error: {e}")
@@ -477,28 +591,49 @@ class SerialConnectionManager:
         if not conn or conn.state != ConnectionState.CONNECTED:
             return None
 
-        # Send command
-        if not await conn.writeline(command):
-            return None
-
-        if not wait_for_response:
-            return ""
+        # While the monitor task owns the reader, receive its lines through a listener
+        # queue instead of racing it for bytes
+        queue: asyncio.Queue[str | None] | None = None
+        if wait_for_response and port in self.monitoring_tasks:
+            queue = conn.subscribe()
+        next_line = queue.get if queue is not None else conn.readline
 
-        # Wait for response
-        response_lines = []
-        start_time = time.time()
+        try:
+            # Send command, encoded once with its line terminator
+            data = command.encode('utf-8')
+            if not data.endswith(b'\n'):
+                data += b'\n'
+            if not await conn.write_bytes(data):
+                return None
+
+            if not wait_for_response:
+                return ""
+
+            # Wait for response under a single deadline instead of a timer per line
+            response_lines = []
+
+            async def collect_response():
+                # Reads suspend until data arrives, so there is no need to poll
+                while True:
+                    line = await next_line()
+                    if line is None or (not line and conn.reader.at_eof()):
+                        break  # Connection closed or errored
+                    if line:
+                        response_lines.append(line)
+                        # Check for common end markers
+                        line_lower = line.lower()
+                        if any(marker in line_lower for marker in _END_MARKERS):
+                            break
 
-        while time.time() - start_time < timeout:
-            line = await asyncio.wait_for(conn.readline(), timeout=0.1)
-            if line:
-                response_lines.append(line)
-                # Check for common end markers
-                if any(marker in line.lower() for marker in ["ok", "error", "done", "ready"]):
-                    break
-            else:
-                await asyncio.sleep(0.01)
+            try:
+                await asyncio.wait_for(collect_response(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
 
-        return "\n".join(response_lines) if response_lines else None
+            return "\n".join(response_lines) if response_lines else None
+        finally:
+            if queue is not None:
+                conn.unsubscribe(queue)
 
     async def reset_board(self, port: str, method: str = "dtr") -> bool:
         """
@@ -508,27 +643,33 @@ class SerialConnectionManager:
             port: Port the board is connected to
             method: Reset method ('dtr', 'rts', or '1200bps')
         """
+        conn = self.get_connection(port)
+        existing = getattr(conn.writer.transport, 'serial', None) if conn and conn.writer else None
         try:
             if method == "1200bps":
-                # Touch at 1200bps for boards like Leonardo
-                temp_ser = serial.Serial(port, 1200)
-                temp_ser.close()
-                await asyncio.sleep(0.5)
-                return True
+                # Touch at 1200bps for boards like Leonardo; opening and closing block
+                temp_ser = await asyncio.to_thread(serial.Serial, port, 1200)
+                await asyncio.to_thread(temp_ser.close)
             else:
-                # Use DTR/RTS for reset
-                temp_ser = serial.Serial(port, 115200)
-                if method == "dtr":
-                    temp_ser.dtr = False
-                    await asyncio.sleep(0.1)
-                    temp_ser.dtr = True
-                elif method == "rts":
-                    temp_ser.rts = False
-                    await asyncio.sleep(0.1)
-                    temp_ser.rts = True
-                temp_ser.close()
-                await asyncio.sleep(0.5)
-                return True
+                # Use DTR/RTS for reset, on the open connection's handle if there is one.
+                # The loop reads that handle and pyserial is not thread-safe, so the
+                # toggles (quick ioctls) stay on the loop; only opening and closing a
+                # fresh port run in a thread
+                temp_ser = existing if existing is not None else await asyncio.to_thread(serial.Serial, port, 115200)
+                try:
+                    if method == "dtr":
+                        temp_ser.dtr = False
+                        await asyncio.sleep(0.1)
+                        temp_ser.dtr = True
+                    elif method == "rts":
+                        temp_ser.rts = False
+                        await asyncio.sleep(0.1)
+                        temp_ser.rts = True
+                finally:
+                    if temp_ser is not existing:
+                        await asyncio.to_thread(temp_ser.close)
+            await asyncio.sleep(0.5)
+            return True
         except Exception as e:
             logger.error(f"Failed to reset board on {port}: {e}")
             return False
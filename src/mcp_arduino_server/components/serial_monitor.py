@@ -4,10 +4,15 @@ Provides cursor-based serial data access with context management
 """
 
 import asyncio
-import uuid
-from dataclasses import asdict, dataclass
+import sys
+import time
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
+from itertools import islice
+from operator import attrgetter
 
 from fastmcp import Context
 from fastmcp.tools import Tool
@@ -24,35 +29,140 @@ class SerialDataType(str, Enum):
     ERROR = "error"
 
 
-@dataclass
+@dataclass(slots=True)
 class SerialDataEntry:
     """A single serial data entry"""
-    timestamp: str
+    timestamp_ns: int  # Formatted lazily in to_dict()
     type: SerialDataType
     data: str
     port: str
     index: int
 
     def to_dict(self) -> dict:
-        return asdict(self)
+        return {
+            "timestamp": datetime.fromtimestamp(self.timestamp_ns / 1e9).isoformat(),
+            "type": self.type.value,
+            "data": self.data,
+            "port": self.port,
+            "index": self.index,
+        }
+
+
+_entry_index = attrgetter("index")
+
+
+class _EntryLog:
+    """
+    List of entries in index order with an amortized O(1) popleft
+
+    Evicted entries stay in the list behind a head offset until they make
+    up half of it, so positional reads and bisect stay O(1) and O(log n).
+    """
+
+    __slots__ = ("_items", "_head")
+
+    def __init__(self, entries: Iterable[SerialDataEntry] = ()):
+        self._items: list[SerialDataEntry] = list(entries)
+        self._head = 0
+
+    def __len__(self) -> int:
+        return len(self._items) - self._head
+
+    def __bool__(self) -> bool:
+        return len(self._items) > self._head
+
+    def __iter__(self) -> Iterator[SerialDataEntry]:
+        return self.iter_from(0)
+
+    def first(self) -> SerialDataEntry:
+        return self._items[self._head]
+
+    def append(self, entry: SerialDataEntry):
+        self._items.append(entry)
+
+    def extend(self, entries: Iterable[SerialDataEntry]):
+        self._items.extend(entries)
+
+    def popleft(self) -> SerialDataEntry:
+        entry = self._items[self._head]
+        self._head += 1
+        if self._head * 2 >= len(self._items):
+            del self._items[:self._head]
+            self._head = 0
+        return entry
+
+    def clear(self):
+        self._items.clear()
+        self._head = 0
+
+    def bisect(self, index: int) -> int:
+        """Offset of the first entry whose index is >= index"""
+        return bisect_left(self._items, index, lo=self._head, key=_entry_index) - self._head
+
+    def iter_from(self, offset: int) -> Iterator[SerialDataEntry]:
+        """Yield entries from offset on without walking the ones before it"""
+        items = self._items
+        return map(items.__getitem__, range(self._head + offset, len(items)))
+
+    def tail(self, count: int) -> list[SerialDataEntry]:
+        """Return the newest count entries"""
+        return self._items[max(self._head, len(self._items) - count):]
+
+
+_EMPTY_LOG = _EntryLog()
 
 
 class SerialDataBuffer:
     """
     Circular buffer with cursor support for serial data
     Provides efficient pagination and data retrieval
+
+    No method awaits, so under asyncio every mutation and read runs to
+    completion without interleaving; no lock is needed as long as
+    iterators from iter_from_cursor() are not held across an await.
     """
 
-    def __init__(self, max_size: int = 10000):
+    def __init__(self, max_size: int = 10000, max_bytes: int = 32 * 1024 * 1024):
         self.max_size = max_size
-        self.buffer: list[SerialDataEntry] = []
+        self.max_bytes = max_bytes  # Cap on total characters of buffered data
+        self.buffer = _EntryLog()
         self.global_index = 0  # Ever-incrementing index
-        self.cursors: dict[str, int] = {}  # cursor_id -> position
+        self.total_bytes = 0
+        # Secondary indexes so filtered reads only visit matching entries
+        self._by_port: dict[str, _EntryLog] = {}
+        self._by_type: dict[SerialDataType, _EntryLog] = {}
+        # Received lines not yet indexed, as (port, receive time, lines) bursts
+        self._pending: list[tuple[str, int, list[str]]] = []
+
+    def receive(self, port: str, line: str):
+        """
+        Queue a received line, indexing its burst on the next loop tick
+
+        Lines the stream had already buffered arrive without yielding to
+        the loop, so each burst is stored in one add_entries() call. Any
+        other add or read flushes pending bursts first, so entries keep
+        their arrival order.
+        """
+        if self._pending and self._pending[-1][0] == port:
+            self._pending[-1][2].append(line)
+            return
+        if not self._pending:
+            asyncio.get_running_loop().call_soon(self.flush_pending)
+        self._pending.append((port, time.time_ns(), [line]))
+
+    def flush_pending(self):
+        """Index received lines queued by receive()"""
+        pending, self._pending = self._pending, []
+        for port, timestamp_ns, lines in pending:
+            self._store_entries(port, lines, SerialDataType.RECEIVED, timestamp_ns)
 
     def add_entry(self, port: str, data: str, data_type: SerialDataType = SerialDataType.RECEIVED):
         """Add a new entry to the buffer"""
+        if self._pending:
+            self.flush_pending()
+
         entry = SerialDataEntry(
-            timestamp=datetime.now().isoformat(),
+            timestamp_ns=time.time_ns(),
             type=data_type,
             data=data,
             port=port,
@@ -60,90 +170,187 @@ class SerialDataBuffer:
         )
         self.global_index += 1
 
-        self.buffer.append(entry)
+        while self.buffer and (
+            len(self.buffer) >= self.max_size or self.total_bytes + len(data) > self.max_bytes
+        ):
+            self._evict_oldest()
 
-        # Maintain circular buffer
-        if len(self.buffer) > self.max_size:
-            self.buffer.pop(0)
+        self.buffer.append(entry)
+        self.total_bytes += len(data)
+        self._by_port.setdefault(port, _EntryLog()).append(entry)
+        self._by_type.setdefault(data_type, _EntryLog()).append(entry)
+
+    def add_entries(self, port: str, datas: list[str], data_type: SerialDataType = SerialDataType.RECEIVED):
+        """Add a burst of entries from one port, sharing a single timestamp"""
+        if self._pending:
+            self.flush_pending()
+        if datas:
+            self._store_entries(port, datas, data_type, time.time_ns())
+
+    def _store_entries(self, port: str, datas: list[str], data_type: SerialDataType, timestamp_ns: int):
+        """Index a non-empty burst of entries from one port"""
+        start = self.global_index
+        self.global_index += len(datas)
+
+        # Entries that would be evicted by the rest of the burst are never stored
+        skip = max(0, len(datas) - self.max_size)
+        burst_bytes = sum(map(len, datas[skip:]))
+        while skip < len(datas) - 1 and burst_bytes > self.max_bytes:
+            burst_bytes -= len(datas[skip])
+            skip += 1
+        entries = [
+            SerialDataEntry(timestamp_ns, data_type, data, port, start + i)
+            for i, data in enumerate(datas[skip:], skip)
+        ]
+
+        while self.buffer and (
+            len(self.buffer) + len(entries) > self.max_size
+            or self.total_bytes + burst_bytes > self.max_bytes
+        ):
+            self._evict_oldest()
+
+        self.buffer.extend(entries)
+        self.total_bytes += burst_bytes
+        self._by_port.setdefault(port, _EntryLog()).extend(entries)
+        self._by_type.setdefault(data_type, _EntryLog()).extend(entries)
+
+    def _evict_oldest(self):
+        """Drop the oldest entry from the buffer and the secondary indexes"""
+        evicted = self.buffer.popleft()
+        self.total_bytes -= len(evicted.data)
+        self._by_port[evicted.port].popleft()
+        self._by_type[evicted.type].popleft()
+
+    @property
+    def head_index(self) -> int:
+        """Global index the oldest entry would have if the buffer has no gaps"""
+        return self.global_index - len(self.buffer)
 
     def create_cursor(self, start_index: int | None = None) -> str:
-        """Create a new cursor for reading data"""
-        cursor_id = str(uuid.uuid4())
+        """
+        Create a new cursor for reading data
 
+        Cursors are stateless tokens encoding the next index to read, so
+        the server keeps nothing per cursor and abandoned ones cost nothing.
+        """
         if start_index is not None:
-            self.cursors[cursor_id] = start_index
-        elif self.buffer:
+            return self.cursor_at(start_index)
+        if self.buffer:
             # Start from oldest available entry
-            self.cursors[cursor_id] = self.buffer[0].index
-        else:
-            # Start from next entry
-            self.cursors[cursor_id] = self.global_index
-
-        return cursor_id
+            return self.cursor_at(self.buffer.first().index)
+        # Start from next entry
+        return self.cursor_at(self.global_index)
+
+    @staticmethod
+    def cursor_at(position: int) -> str:
+        """Encode a buffer position as a cursor token"""
+        return f"c:{position}"
+
+    @staticmethod
+    def _cursor_position(cursor_id: str) -> int | None:
+        """Decode a client-supplied cursor token, or None if malformed"""
+        prefix, _, position = cursor_id.partition(":")
+        if prefix != "c":
+            return None
+        try:
+            return int(position)
+        except ValueError:
+            return None
 
-    def read_from_cursor(
+    def iter_from_cursor(
         self,
         cursor_id: str,
-        limit: int = 100,
         port_filter: str | None = None,
         type_filter: SerialDataType | None = None
-    ) -> tuple[list[SerialDataEntry], bool]:
+    ) -> Iterator[SerialDataEntry]:
         """
-        Read entries from cursor position
+        Lazily yield entries from cursor position
 
-        Returns:
-            Tuple of (entries, has_more)
+        Callers resume with cursor_at(last_entry.index + 1), so they can
+        stop early (e.g. with islice) without losing their place.
+        The buffer must not be modified while the iterator is in use.
         """
-        if cursor_id not in self.cursors:
-            return [], False
-
-        cursor_pos = self.cursors[cursor_id]
-        entries = []
-
-        for entry in self.buffer:
-            # Skip entries before cursor
-            if entry.index < cursor_pos:
-                continue
+        if self._pending:
+            self.flush_pending()
+
+        cursor_pos = self._cursor_position(cursor_id)
+        if cursor_pos is None:
+            return
+
+        if not port_filter and not type_filter:
+            head_index = self.head_index
+            if not self.buffer or self.buffer.first().index == head_index:
+                # Contiguous indices: the cursor maps straight to a buffer position
+                start = max(0, cursor_pos - head_index)
+            else:
+                # clear(port) left gaps; indices are still sorted, so bisect
+                start = self.buffer.bisect(cursor_pos)
+            source = self.buffer
+        else:
+            # Walk the smaller matching index instead of the whole buffer
+            candidates = [
+                self._by_port.get(port_filter, _EMPTY_LOG) if port_filter else None,
+                self._by_type.get(type_filter, _EMPTY_LOG) if type_filter else None,
+            ]
+            source = min((c for c in candidates if c is not None), key=len)
+            start = source.bisect(cursor_pos)
 
+        for entry in source.iter_from(start):
             # Apply filters
             if port_filter and entry.port != port_filter:
                 continue
             if type_filter and entry.type != type_filter:
                 continue
 
-            entries.append(entry)
-
-            if len(entries) >= limit:
-                break
+            yield entry
 
-        # Update cursor position
-        if entries:
-            self.cursors[cursor_id] = entries[-1].index + 1
+    def has_more(self, last_index: int) -> bool:
+        """Whether entries newer than last_index exist"""
+        return last_index < self.global_index - 1
 
-        # Check if there's more data
-        has_more = False
-        if entries and entries[-1].index < self.global_index - 1:
-            has_more = True
+    def read_from_cursor(
+        self,
+        cursor_id: str,
+        limit: int = 100,
+        port_filter: str | None = None,
+        type_filter: SerialDataType | None = None
+    ) -> tuple[list[SerialDataEntry], bool, str]:
+        """
+        Read entries from cursor position
 
-        return entries, has_more
+        Returns:
+            Tuple of (entries, has_more, next_cursor_id)
+        """
+        entries = list(islice(self.iter_from_cursor(cursor_id, port_filter, type_filter), limit))
+        if not entries:
+            return entries, False, cursor_id
+        return entries, self.has_more(entries[-1].index), self.cursor_at(entries[-1].index + 1)
 
     def delete_cursor(self, cursor_id: str):
-        """Delete a cursor"""
-        self.cursors.pop(cursor_id, None)
+        """Delete a cursor (a no-op: cursors hold no server state)"""
 
     def get_latest(self, port: str | None = None, limit: int = 10) -> list[SerialDataEntry]:
         """Get latest entries without cursor"""
-        entries = self.buffer[-limit:] if not port else [
-            e for e in self.buffer if e.port == port
-        ][-limit:]
-        return entries
+        if self._pending:
+            self.flush_pending()
+        source = self._by_port.get(port, _EMPTY_LOG) if port else self.buffer
+        return source.tail(limit)
 
     def clear(self, port: str | None = None):
         """Clear buffer for a specific port or all"""
+        if self._pending:
+            self.flush_pending()
         if port:
-            self.buffer = [e for e in self.buffer if e.port != port]
+            self.buffer = _EntryLog(e for e in self.buffer if e.port != port)
+            self._by_port.pop(port, None)
+            for data_type, entries in self._by_type.items():
+                self._by_type[data_type] = _EntryLog(e for e in entries if e.port != port)
+            self.total_bytes = sum(len(e.data) for e in self.buffer)
         else:
             self.buffer.clear()
+            self.total_bytes = 0
+            self._by_port.clear()
+            self._by_type.clear()
 
 
 class SerialMonitorContext:
@@ -174,7 +381,8 @@ class SerialMonitorContext:
             "connected_ports": connected_ports,
             "active_monitors": list(self.active_monitors.keys()),
             "buffer_size": len(self.data_buffer.buffer),
-            "active_cursors": len(self.data_buffer.cursors),
+            "buffer_bytes": self.data_buffer.total_bytes,
+            "active_cursors": 0,  # Cursors are stateless tokens; kept for compatibility
             "connections": {}
         }
 
@@ -192,6 +400,25 @@ class SerialMonitorContext:
         return state
 
 
+_monitor_lock = asyncio.Lock()
+
+
+async def _get_monitor(ctx: Context) -> SerialMonitorContext:
+    """Return the context's serial monitor, creating it exactly once"""
+    monitor = ctx.state.get("serial_monitor")
+    if monitor is not None:
+        return monitor
+
+    async with _monitor_lock:
+        # Another tool call may have created it while we waited
+        monitor = ctx.state.get("serial_monitor")
+        if monitor is None:
+            monitor = SerialMonitorContext()
+            await monitor.initialize()
+            ctx.state["serial_monitor"] = monitor
+        return monitor
+
+
 # Pydantic models for tool inputs/outputs
 
 class SerialConnectParams(BaseModel):
@@ -218,7 +445,7 @@ class SerialSendParams(BaseModel):
 
 class SerialReadParams(BaseModel):
     """Parameters for reading serial data"""
-    cursor_id: str | None = Field(None, description="Cursor ID for pagination")
+    cursor_id: str | None = Field(None, description="Cursor ID from the previous read, for pagination")
     port: str | None = Field(None, description="Filter by port")
     limit: int = Field(100, description="Maximum entries to return")
     type_filter: SerialDataType | None = Field(None, description="Filter by data type")
@@ -250,30 +477,29 @@ class SerialConnectTool(Tool):
     parameters: type = SerialConnectParams
 
     async def run(self, params: SerialConnectParams, ctx: Context) -> dict:
-        monitor = ctx.state.get("serial_monitor")
-        if not monitor:
-            monitor = SerialMonitorContext()
-            await monitor.initialize()
-            ctx.state["serial_monitor"] = monitor
+        monitor = await _get_monitor(ctx)
+
+        # Every entry from this port shares one string object
+        port = sys.intern(params.port)
 
         try:
             # Connect to port
             conn = await monitor.connection_manager.connect(
-                port=params.port,
+                port=port,
                 baudrate=params.baudrate,
                 auto_monitor=params.auto_monitor,
                 exclusive=params.exclusive
             )
 
-            # Set up data listener
-            async def on_data_received(line: str):
-                monitor.data_buffer.add_entry(params.port, line, SerialDataType.RECEIVED)
+            # Plain callback: runs inline in the port's reader task
+            def on_data_received(line: str):
+                monitor.data_buffer.receive(port, line)
 
             conn.add_listener(on_data_received)
 
             # Add system message
             monitor.data_buffer.add_entry(
-                params.port,
+                port,
                 f"Connected at {params.baudrate} baud",
                 SerialDataType.SYSTEM
             )
@@ -379,19 +605,29 @@ class SerialReadTool(Tool):
             cursor_id = monitor.data_buffer.create_cursor()
 
         if cursor_id:
-            # Read from cursor
-            entries, has_more = monitor.data_buffer.read_from_cursor(
-                cursor_id,
-                params.limit,
-                params.port,
-                params.type_filter
-            )
+            # Read from cursor, serializing each entry as it is produced.
+            # FastMCP encodes tool results with pydantic_core, so plain
+            # dicts of str/int are already on its fastest path.
+            entries = [
+                e.to_dict()
+                for e in islice(
+                    monitor.data_buffer.iter_from_cursor(cursor_id, params.port, params.type_filter),
+                    params.limit
+                )
+            ]
+
+            # Cursors are stateless: hand back a token for the next position
+            has_more = False
+            if entries:
+                last_index = entries[-1]["index"]
+                cursor_id = monitor.data_buffer.cursor_at(last_index + 1)
+                has_more = monitor.data_buffer.has_more(last_index)
 
             return {
                 "success": True,
                 "cursor_id": cursor_id,
                 "has_more": has_more,
-                "entries": [e.to_dict() for e in entries],
+                "entries": entries,
                 "count": len(entries)
             }
         else:
@@ -411,11 +647,7 @@ class SerialListPortsTool(Tool):
     parameters: type = SerialListPortsParams
 
     async def run(self, params: SerialListPortsParams, ctx: Context) -> dict:
-        monitor = ctx.state.get("serial_monitor")
-        if not monitor:
-            monitor = SerialMonitorContext()
-            await monitor.initialize()
-            ctx.state["serial_monitor"] = monitor
+        monitor = await _get_monitor(ctx)
 
         if params.arduino_only:
             ports = await monitor.connection_manager.list_arduino_ports()
@@ -1,299 +1,77 @@
 """WireViz circuit diagram generation component"""
-import datetime
+import asyncio
+import hashlib
 import logging
 import os
+import re
+import shutil
 import subprocess
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
 from fastmcp import Context
 from fastmcp.contrib.mcp_mixin import MCPMixin, mcp_resource, mcp_tool
 from fastmcp.utilities.types import Image
-from mcp.types import SamplingMessage, ToolAnnotations
+from mcp.types import SamplingMessage, TextContent, ToolAnnotations
 from pydantic import BaseModel, Field
 
 log = logging.getLogger(__name__)
 
+# Rendered diagrams kept in memory, keyed by a hash of the YAML input
+_PNG_CACHE_SIZE = 64
 
-class WireVizRequest(BaseModel):
-    """Request model for WireViz operations"""
-    yaml_content: str | None = Field(None, description="WireViz YAML content")
-    description: str | None = Field(None, description="Natural language circuit description")
-    sketch_name: str = Field("circuit", description="Name for output files")
-    output_base: str = Field("circuit", description="Base name for output files")
-
-
-class WireViz(MCPMixin):
-    """WireViz circuit diagram generation component"""
-
-    def __init__(self, config):
-        """Initialize WireViz mixin with configuration"""
-        self.config = config
-        self.wireviz_path = config.wireviz_path
-        self.sketches_base_dir = config.sketches_base_dir
-
-    @mcp_resource(uri="wireviz://instructions")
-    async def get_wireviz_instructions(self) -> str:
-        """WireViz usage instructions and examples"""
-        return """
-# WireViz Circuit Diagram Instructions
-
-WireViz is a tool for generating circuit wiring diagrams from YAML descriptions.
-
-## Basic YAML Structure:
-
-```yaml
-connectors:
-  Arduino:
-    type: Arduino Uno
-    pins: [GND, 5V, D2, D3, A0]
-
-  LED:
-    type: LED
-    pins: [cathode, anode]
-
-cables:
-  power:
-    colors: [BK, RD]  # Black, Red
-    gauge: 22 AWG
-
-connections:
-  - Arduino: [GND]
-    cable: [1]
-    LED: [cathode]
-  - Arduino: [D2]
-    cable: [2]
-    LED: [anode]
-```
-
-## Color Codes:
-- BK: Black, RD: Red, BL: Blue, GN: Green, YE: Yellow
-- OR: Orange, VT: Violet, GY: Gray, WH: White, BN: Brown
-
-## Tips:
-1. Define all connectors first
-2. Specify cable properties (colors, gauge)
-3. Map connections clearly
-4. Use descriptive names
-
-For AI-powered generation from descriptions, use the
-`wireviz_generate_from_description` tool.
-"""
-
-    @mcp_tool(
-        name="wireviz_generate_from_yaml",
-        description="Generate circuit diagram from WireViz YAML",
-        annotations=ToolAnnotations(
-            title="Generate Circuit Diagram from YAML",
-            destructiveHint=False,
-            idempotentHint=True,
-        )
-    )
-    async def generate_from_yaml(
-        self,
-        yaml_content: str,
-        output_base: str = "circuit"
-    ) -> dict[str, Any]:
-        """Generate circuit diagram from WireViz YAML"""
-        try:
-            # Create timestamped output directory
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_dir = self.sketches_base_dir / f"wireviz_{timestamp}"
-            output_dir.mkdir(parents=True, exist_ok=True)
-
-            # Write YAML to temporary file
-            yaml_path = output_dir / f"{output_base}.yaml"
-            yaml_path.write_text(yaml_content)
-
-            # Run WireViz
-            cmd = [self.wireviz_path, str(yaml_path), "-o", str(output_dir)]
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=self.config.command_timeout
-            )
-
-            if result.returncode != 0:
-                error_msg = f"WireViz failed: {result.stderr}"
-                log.error(error_msg)
-                from mcp.types import TextContent
-                return TextContent(
-                    type="text",
-                    text=f"Error: {error_msg}"
-                )
-
-            # Find generated PNG
-            png_files = list(output_dir.glob("*.png"))
-            if not png_files:
-                from mcp.types import TextContent
-                return TextContent(
-                    type="text",
-                    text="Error: No PNG file generated"
-                )
-
-            png_path = png_files[0]
-
-            # Read image data
-            with open(png_path, "rb") as f:
-                image_data = f.read()
-
-            # Open image in default viewer
-            self._open_file(png_path)
-
-            # Return the Image directly so FastMCP converts it to ImageContent
-            # Include path information in the image annotations
-            return Image(
-                data=image_data,  # Use raw bytes, not encoded
-                format="png",
-                annotations={
-                    "description": f"Circuit diagram generated: {png_path}",
-                    "paths": {
-                        "yaml": str(yaml_path),
-                        "png": str(png_path),
-                        "directory": str(output_dir)
-                    }
-                }
-            )
-
-        except subprocess.TimeoutExpired:
-            from mcp.types import TextContent
-            return TextContent(
-                type="text",
-                text=f"Error: WireViz timed out after {self.config.command_timeout} seconds"
-            )
-        except Exception as e:
-            log.exception("WireViz generation failed")
-            from mcp.types import TextContent
-            return TextContent(
-                type="text",
-                text=f"Error: {str(e)}"
-            )
-
-    @mcp_tool(
-        name="wireviz_generate_from_description",
-        description="Generate circuit diagram from natural language description",
-        annotations=ToolAnnotations(
-            title="Generate Circuit from Description",
-            destructiveHint=False,
-            idempotentHint=False,
-        )
-    )
-    async def generate_from_description(
-        self,
-        ctx: Context,
-        description: str,
-        sketch_name: str = "",
-        output_base: str = "circuit"
-    ) -> dict[str, Any]:
-        """Generate circuit diagram from natural language description
+# Content-addressed PNGs kept on disk under sketches_base_dir across restarts
+_DISK_CACHE_DIR = ".wireviz_cache"
+_DISK_CACHE_SIZE = 256
 
-        This method intelligently handles both sampling-capable and non-sampling clients:
-        1. Always tries sampling first for clients that support it
-        2. Falls back gracefully to template generation when sampling isn't available
-        3. Provides helpful feedback about which mode was used
+# Content-hash output directories (wireviz_<12 hex digits>) kept under
+# sketches_base_dir; older timestamped directories are left alone
+_OUTPUT_DIR_RE = re.compile(r"wireviz_[0-9a-f]{12}")
+_OUTPUT_DIR_LIMIT = 64
 
-        Args:
-            ctx: FastMCP context (automatically injected during requests)
-            description: Natural language description of the circuit
-            sketch_name: Optional Arduino sketch name for context
-            output_base: Base name for output files
-        """
+# Only the PNG is returned, so skip WireViz's HTML/SVG/TSV outputs
+_WIREVIZ_FORMATS = ("png",)
+_WIREVIZ_FORMAT_CODES = "p"  # CLI -f spelling of _WIREVIZ_FORMATS
 
-        try:
-            # Track which method we use for generation
-            generation_method = "unknown"
-            yaml_content = None
+# Viewer launchers are detached and never waited on
+_LAUNCH_OPTIONS = {
+    "stdout": subprocess.DEVNULL,
+    "stderr": subprocess.DEVNULL,
+    "start_new_session": True,
+}
 
-            # Always try sampling first if the context has the method
-            if hasattr(ctx, 'sample') and callable(ctx.sample):
-                try:
-                    log.info("Attempting to use client sampling for WireViz generation")
+# Marks the render thread so _RenderStdout can route its output
+_render_thread = threading.local()
 
-                    # Create prompt for YAML generation
-                    prompt = self._create_wireviz_prompt(description, sketch_name)
 
-                    # Use client sampling to generate WireViz YAML
-                    from mcp.types import TextContent
-                    messages = [
-                        SamplingMessage(
-                            role="user",
-                            content=TextContent(
-                                type="text",
-                                text=f"You are an expert at creating WireViz YAML circuit diagrams. Return ONLY valid YAML content, no explanations or markdown code blocks.\n\n{prompt}"
-                            )
-                        )
-                    ]
+def _mark_render_thread() -> None:
+    _render_thread.active = True
 
-                    # Request completion from the client
-                    result = await ctx.sample(
-                        messages=messages,
-                        max_tokens=2000,
-                        temperature=0.3
-                    )
-
-                    if result and result.content:
-                        yaml_content = self._clean_yaml_content(result.content)
-                        generation_method = "ai-generated"
-                        log.info("Successfully generated WireViz YAML using client sampling")
-                    else:
-                        # Sampling returned empty result
-                        log.info("Client sampling returned empty result, falling back to template")
-                        yaml_content = self._generate_template_yaml(description)
-                        generation_method = "template-with-sampling-context"
 
-                except Exception as e:
-                    # Sampling failed - this is expected for some clients like Claude Desktop
-                    error_msg = str(e)
-                    if "Method not found" in error_msg:
-                        log.info("Client doesn't support sampling endpoint (expected for Claude Desktop)")
-                    else:
-                        log.warning(f"Sampling failed with unexpected error: {error_msg}")
+# WireViz's parse() is not known to be thread-safe, so renders run one at a
+# time on a thread of their own; a hung render can't tie up the default
+# executor that also serves the arduino-cli calls
+_render_executor = ThreadPoolExecutor(
+    max_workers=1, thread_name_prefix="wireviz-render", initializer=_mark_render_thread
+)
 
-                    yaml_content = self._generate_template_yaml(description)
-                    generation_method = "template-fallback"
+# A render that outlived its timeout and still occupies the render thread
+_stuck_render: Future | None = None
 
-            else:
-                # Context doesn't have sample method at all
-                log.info("Context doesn't provide sampling capability, using template")
-                yaml_content = self._generate_template_yaml(description)
-                generation_method = "template-no-sampling"
-
-            # Generate diagram from YAML (regardless of source)
-            diagram_result = await self.generate_from_yaml(
-                yaml_content=yaml_content,
-                output_base=output_base
-            )
-
-            # If we get an Image result, enhance its annotations with generation method
-            if hasattr(diagram_result, 'annotations') and isinstance(diagram_result.annotations, dict):
-                diagram_result.annotations['generation_method'] = generation_method
-                if generation_method.startswith('template'):
-                    diagram_result.annotations['note'] = (
-                        "This is a template diagram. "
-                        "For AI-generated diagrams, use a client that supports sampling "
-                        "or customize the YAML manually."
-                    )
-                elif generation_method == 'ai-generated':
-                    diagram_result.annotations['note'] = (
-                        "AI-generated circuit diagram based on your description"
-                    )
-
-            return diagram_result
-
-        except Exception as e:
-            log.exception("WireViz generation failed completely")
-            from mcp.types import TextContent
-            return TextContent(
-                type="text",
-                text=f"Error: Generation failed: {str(e)}\n\nPlease check the logs for details."
-            )
-
-    def _create_wireviz_prompt(self, description: str, sketch_name: str) -> str:
-        """Create prompt for AI to generate WireViz YAML"""
-        base_prompt = """Generate a WireViz YAML circuit diagram for the following description:
-
-Description: {description}
+# Fixed part of the sampling prompt. Everything constant comes before the
+# user's description so repeated requests share one long prompt prefix,
+# which clients with prompt caching can reuse.
+_SAMPLING_PREAMBLE = (
+    "You are an expert at creating WireViz YAML circuit diagrams. "
+    "Return ONLY valid YAML content, no explanations or markdown code blocks.\n\n"
+)
+_PROMPT_PREFIX = """Generate a WireViz YAML circuit diagram for the description below.
 
 Requirements:
 1. Use proper WireViz YAML syntax
@@ -302,36 +80,14 @@ Requirements:
 4. Add descriptive labels
 5. Follow electrical safety standards
 
-Return ONLY the YAML content, no explanations."""
-
-        if sketch_name:
-            base_prompt += f"\n\nThis is for an Arduino sketch named: {sketch_name}"
+Return ONLY the YAML content, no explanations.
 
-        return base_prompt.format(description=description)
+Description: """
 
-    def _generate_template_yaml(self, description: str) -> str:
-        """Generate an intelligent template YAML based on keywords in the description
 
-        This provides better starting points when AI sampling isn't available.
-        """
-        desc_lower = description.lower()
-
-        # Detect common components and generate appropriate template
-        # Check display first (before LED) to catch OLED/LCD properly
-        if 'display' in desc_lower or 'lcd' in desc_lower or 'oled' in desc_lower:
-            template = self._generate_display_template(description)
-        elif 'led' in desc_lower:
-            template = self._generate_led_template(description)
-        elif 'motor' in desc_lower or 'servo' in desc_lower:
-            template = self._generate_motor_template(description)
-        elif 'sensor' in desc_lower:
-            template = self._generate_sensor_template(description)
-        elif 'button' in desc_lower or 'switch' in desc_lower:
-            template = self._generate_button_template(description)
-        else:
-            # Generic template
-            template = f"""# WireViz Circuit Diagram
-# Generated from: {description[:100]}...
+# Starter diagrams for clients without sampling; {desc} is the description prefix
+_GENERIC_TEMPLATE = """# WireViz Circuit Diagram
+# Generated from: {desc}...
 # Note: This is a template. Customize it for your specific circuit.
 # For AI-generated diagrams, use a client that supports sampling.
 
@@ -374,12 +130,9 @@ options:
   bgcolor: white
   color_mode: full
 """
-        return template
 
-    def _generate_led_template(self, description: str) -> str:
-        """Generate LED circuit template"""
-        return f"""# WireViz LED Circuit
-# Description: {description[:100]}...
+_LED_TEMPLATE = """# WireViz LED Circuit
+# Description: {desc}...
 # Template for LED circuits - customize as needed
 
 connectors:
@@ -418,10 +171,8 @@ options:
   color_mode: full
 """
 
-    def _generate_motor_template(self, description: str) -> str:
-        """Generate motor/servo circuit template"""
-        return f"""# WireViz Motor/Servo Circuit
-# Description: {description[:100]}...
+_MOTOR_TEMPLATE = """# WireViz Motor/Servo Circuit
+# Description: {desc}...
 # Template for motor control - customize as needed
 
 connectors:
@@ -464,10 +215,8 @@ options:
   color_mode: full
 """
 
-    def _generate_sensor_template(self, description: str) -> str:
-        """Generate sensor circuit template"""
-        return f"""# WireViz Sensor Circuit
-# Description: {description[:100]}...
+_SENSOR_TEMPLATE = """# WireViz Sensor Circuit
+# Description: {desc}...
 # Template for sensor connections - customize as needed
 
 connectors:
@@ -510,10 +259,8 @@ options:
   color_mode: full
 """
 
-    def _generate_button_template(self, description: str) -> str:
-        """Generate button/switch circuit template"""
-        return f"""# WireViz Button/Switch Circuit
-# Description: {description[:100]}...
+_BUTTON_TEMPLATE = """# WireViz Button/Switch Circuit
+# Description: {desc}...
 # Template for button input - customize as needed
 
 connectors:
@@ -553,10 +300,8 @@ options:
   notes: Pull-up resistor (10kΩ) connects D2 to 5V
 """
 
-    def _generate_display_template(self, description: str) -> str:
-        """Generate display circuit template"""
-        return f"""# WireViz Display Circuit
-# Description: {description[:100]}...
+_DISPLAY_TEMPLATE = """# WireViz Display Circuit
+# Description: {desc}...
 # Template for display connections - customize as needed
 
 connectors:
@@ -604,17 +349,509 @@ options:
   notes: I2C communication at 0x3C or 0x27 address
 """
 
+# First matching keyword group wins; display is checked before LED so that
+# OLED/LCD descriptions are not caught by "led"
+_TEMPLATE_KEYWORDS = (
+    (("display", "lcd", "oled"), _DISPLAY_TEMPLATE),
+    (("led",), _LED_TEMPLATE),
+    (("motor", "servo"), _MOTOR_TEMPLATE),
+    (("sensor",), _SENSOR_TEMPLATE),
+    (("button", "switch"), _BUTTON_TEMPLATE),
+)
+
+# One regex pass finds every keyword; the lookahead also reports keywords that
+# overlap another match ("oled" and its "led"), so precedence is decided by
+# group rank exactly as with one substring test per keyword
+_KEYWORD_RANK = {
+    keyword: rank
+    for rank, (keywords, _) in enumerate(_TEMPLATE_KEYWORDS)
+    for keyword in keywords
+}
+_KEYWORD_RE = re.compile(f"(?=({'|'.join(map(re.escape, _KEYWORD_RANK))}))")
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    """Hard-link src to dst so no PNG bytes are copied, else copy the file"""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+class _RenderStdout:
+    """
+    sys.stdout stand-in that sends the render thread's output to stderr
+
+    WireViz prints progress to stdout, which carries the MCP stdio protocol.
+    Every other thread keeps writing to the real stdout, so nothing is
+    swapped process-wide while a render runs.
+    """
+
+    def __init__(self, stdout):
+        self._stdout = stdout
+
+    def _target(self):
+        return sys.stderr if getattr(_render_thread, "active", False) else self._stdout
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self) -> None:
+        self._target().flush()
+
+    def __getattr__(self, name: str):
+        return getattr(self._target(), name)
+
+
+def _render_in_process(wireviz_api, yaml_content: str, yaml_path: Path, output_dir: Path) -> None:
+    """Render yaml_content as the wireviz CLI would render yaml_path, on the render thread"""
+    wireviz_api.parse(
+        yaml_content,
+        output_formats=_WIREVIZ_FORMATS,
+        output_dir=output_dir,
+        output_name=yaml_path.stem,
+        image_paths={yaml_path.parent},
+    )
+
+
+@lru_cache(maxsize=256)
+def _template_yaml(description: str) -> str:
+    """Pick and fill the starter template matching keywords in description"""
+    ranks = {_KEYWORD_RANK[keyword] for keyword in _KEYWORD_RE.findall(description.lower())}
+    template = _TEMPLATE_KEYWORDS[min(ranks)][1] if ranks else _GENERIC_TEMPLATE
+    return template.format(desc=description[:100])
+
+
+class WireVizRequest(BaseModel):
+    """Request model for WireViz operations"""
+    yaml_content: str | None = Field(None, description="WireViz YAML content")
+    description: str | None = Field(None, description="Natural language circuit description")
+    sketch_name: str = Field("circuit", description="Name for output files")
+    output_base: str = Field("circuit", description="Base name for output files")
+
+
+class WireViz(MCPMixin):
+    """WireViz circuit diagram generation component"""
+
+    def __init__(self, config):
+        """Initialize WireViz mixin with configuration"""
+        self.config = config
+        self.wireviz_path = config.wireviz_path
+        self.sketches_base_dir = config.sketches_base_dir
+        self._png_cache: OrderedDict[tuple[str, str], tuple[Path, Path, Path]] = OrderedDict()
+        # One lock per YAML digest, alive while any call for that digest holds it
+        self._digest_locks: weakref.WeakValueDictionary[str, asyncio.Lock] = weakref.WeakValueDictionary()
+
+    @mcp_resource(uri="wireviz://instructions")
+    async def get_wireviz_instructions(self) -> str:
+        """WireViz usage instructions and examples"""
+        return """
+# WireViz Circuit Diagram Instructions
+
+WireViz is a tool for generating circuit wiring diagrams from YAML descriptions.
+
+## Basic YAML Structure:
+
+```yaml
+connectors:
+  Arduino:
+    type: Arduino Uno
+    pins: [GND, 5V, D2, D3, A0]
+
+  LED:
+    type: LED
+    pins: [cathode, anode]
+
+cables:
+  power:
+    colors: [BK, RD]  # Black, Red
+    gauge: 22 AWG
+
+connections:
+  - Arduino: [GND]
+    cable: [1]
+    LED: [cathode]
+  - Arduino: [D2]
+    cable: [2]
+    LED: [anode]
+```
+
+## Color Codes:
+- BK: Black, RD: Red, BL: Blue, GN: Green, YE: Yellow
+- OR: Orange, VT: Violet, GY: Gray, WH: White, BN: Brown
+
+## Tips:
+1. Define all connectors first
+2. Specify cable properties (colors, gauge)
+3. Map connections clearly
+4. Use descriptive names
+
+For AI-powered generation from descriptions, use the
+`wireviz_generate_from_description` tool.
+"""
+
+    @mcp_tool(
+        name="wireviz_generate_from_yaml",
+        description="Generate circuit diagram from WireViz YAML",
+        annotations=ToolAnnotations(
+            title="Generate Circuit Diagram from YAML",
+            destructiveHint=False,
+            idempotentHint=True,
+        )
+    )
+    async def generate_from_yaml(
+        self,
+        yaml_content: str,
+        output_base: str = "circuit"
+    ) -> dict[str, Any]:
+        """Generate circuit diagram from WireViz YAML"""
+        try:
+            # Identical YAML renders an identical diagram, so reuse earlier output
+            digest = hashlib.blake2b(yaml_content.encode(), digest_size=16).hexdigest()
+            cache_key = (output_base, digest)
+            cached = self._png_cache.get(cache_key)
+            if cached and cached[1].exists():
+                self._png_cache.move_to_end(cache_key)
+                yaml_path, png_path, output_dir = cached
+                os.utime(output_dir)
+                await asyncio.to_thread(self._open_file, png_path)
+                return self._diagram_image(yaml_path, png_path, output_dir)
+
+            # Calls with identical YAML share an output directory; render it once
+            lock = self._digest_locks.get(digest)
+            if lock is None:
+                lock = self._digest_locks[digest] = asyncio.Lock()
+            async with lock:
+                # Name the output directory by content: the same YAML always lands
+                # in the same place, and calls within one second no longer share
+                # (and race on) a timestamped directory
+                output_dir = self.sketches_base_dir / f"wireviz_{digest[:12]}"
+                try:
+                    output_dir.mkdir(parents=True)
+                except FileExistsError:
+                    # Mark as recently used so pruning keeps it
+                    os.utime(output_dir)
+                else:
+                    await asyncio.to_thread(self._prune_output_dirs)
+
+                # Write YAML to temporary file
+                yaml_path = output_dir / f"{output_base}.yaml"
+                await asyncio.to_thread(yaml_path.write_text, yaml_content)
+
+                # WireViz names its output after the YAML file
+                png_path = output_dir / f"{output_base}.png"
+                cached_png = self.sketches_base_dir / _DISK_CACHE_DIR / f"{digest}.png"
+                if png_path.exists():
+                    # Already rendered into this directory
+                    pass
+                elif cached_png.exists():
+                    # Rendered before, possibly by an earlier server run
+                    await asyncio.to_thread(_link_or_copy, cached_png, png_path)
+                    os.utime(cached_png)
+                else:
+                    error = await self._run_wireviz(yaml_path, output_dir, yaml_content)
+                    if error:
+                        return error
+
+                    if not png_path.exists():
+                        return TextContent(
+                            type="text",
+                            text="Error: No PNG file generated"
+                        )
+
+                    await asyncio.to_thread(self._store_cached_png, png_path, cached_png)
+
+                self._png_cache[cache_key] = (yaml_path, png_path, output_dir)
+                if len(self._png_cache) > _PNG_CACHE_SIZE:
+                    self._png_cache.popitem(last=False)
+
+            # Open image in default viewer
+            await asyncio.to_thread(self._open_file, png_path)
+
+            return self._diagram_image(yaml_path, png_path, output_dir)
+
+        except Exception as e:
+            log.exception("WireViz generation failed")
+            return TextContent(
+                type="text",
+                text=f"Error: {str(e)}"
+            )
+
+    @mcp_tool(
+        name="wireviz_generate_from_description",
+        description="Generate circuit diagram from natural language description",
+        annotations=ToolAnnotations(
+            title="Generate Circuit from Description",
+            destructiveHint=False,
+            idempotentHint=False,
+        )
+    )
+    async def generate_from_description(
+        self,
+        ctx: Context,
+        description: str,
+        sketch_name: str = "",
+        output_base: str = "circuit"
+    ) -> dict[str, Any]:
+        """Generate circuit diagram from natural language description
+
+        This method intelligently handles both sampling-capable and non-sampling clients:
+        1. Always tries sampling first for clients that support it
+        2. Falls back gracefully to template generation when sampling isn't available
+        3. Provides helpful feedback about which mode was used
+
+        Args:
+            ctx: FastMCP context (automatically injected during requests)
+            description: Natural language description of the circuit
+            sketch_name: Optional Arduino sketch name for context
+            output_base: Base name for output files
+        """
+
+        try:
+            # Track which method we use for generation
+            generation_method = "unknown"
+            yaml_content = None
+
+            # Always try sampling first if the context has the method
+            if hasattr(ctx, 'sample') and callable(ctx.sample):
+                try:
+                    log.info("Attempting to use client sampling for WireViz generation")
+
+                    # Create prompt for YAML generation
+                    prompt = self._create_wireviz_prompt(description, sketch_name)
+
+                    # Use client sampling to generate WireViz YAML
+                    messages = [
+                        SamplingMessage(
+                            role="user",
+                            content=TextContent(
+                                type="text",
+                                text=_SAMPLING_PREAMBLE + prompt
+                            )
+                        )
+                    ]
+
+                    # Request completion from the client
+                    result = await ctx.sample(
+                        messages=messages,
+                        max_tokens=2000,
+                        temperature=0.3
+                    )
+
+                    if result and result.content:
+                        yaml_content = self._clean_yaml_content(result.content)
+                        generation_method = "ai-generated"
+                        log.info("Successfully generated WireViz YAML using client sampling")
+                    else:
+                        # Sampling returned empty result
+                        log.info("Client sampling returned empty result, falling back to template")
+                        yaml_content = self._generate_template_yaml(description)
+                        generation_method = "template-with-sampling-context"
+
+                except Exception as e:
+                    # Sampling failed - this is expected for some clients like Claude Desktop
+                    error_msg = str(e)
+                    if "Method not found" in error_msg:
+                        log.info("Client doesn't support sampling endpoint (expected for Claude Desktop)")
+                    else:
+                        log.warning(f"Sampling failed with unexpected error: {error_msg}")
+
+                    yaml_content = self._generate_template_yaml(description)
+                    generation_method = "template-fallback"
+
+            else:
+                # Context doesn't have sample method at all
+                log.info("Context doesn't provide sampling capability, using template")
+                yaml_content = self._generate_template_yaml(description)
+                generation_method = "template-no-sampling"
+
+            # Generate diagram from YAML (regardless of source)
+            diagram_result = await self.generate_from_yaml(
+                yaml_content=yaml_content,
+                output_base=output_base
+            )
+
+            # If we get an Image result, enhance its annotations with generation method
+            if hasattr(diagram_result, 'annotations') and isinstance(diagram_result.annotations, dict):
+                diagram_result.annotations['generation_method'] = generation_method
+                if generation_method.startswith('template'):
+                    diagram_result.annotations['note'] = (
+                        "This is a template diagram. "
+                        "For AI-generated diagrams, use a client that supports sampling "
+                        "or customize the YAML manually."
+                    )
+                elif generation_method == 'ai-generated':
+                    diagram_result.annotations['note'] = (
+                        "AI-generated circuit diagram based on your description"
+                    )
+
+            return diagram_result
+
+        except Exception as e:
+            log.exception("WireViz generation failed completely")
+            return TextContent(
+                type="text",
+                text=f"Error: Generation failed: {str(e)}\n\nPlease check the logs for details."
+            )
+
+    async def _run_wireviz(self, yaml_path: Path, output_dir: Path, yaml_content: str):
+        """Run WireViz on yaml_path, returning error content on failure"""
+        global _stuck_render
+
+        # The bundled wireviz package renders in-process, skipping a Python
+        # interpreter start per diagram; an explicit wireviz_path uses the CLI.
+        # In-process rendering takes the YAML text directly; the CLI has no
+        # stdin input and reads the yaml_path file written for provenance
+        if self.wireviz_path == "wireviz":
+            try:
+                from wireviz import wireviz as wireviz_api
+            except ImportError:
+                wireviz_api = None
+
+            if wireviz_api is not None:
+                if _stuck_render is not None and not _stuck_render.done():
+                    return TextContent(
+                        type="text",
+                        text="Error: WireViz renderer is busy with a render that timed out, try again later"
+                    )
+
+                if not isinstance(sys.stdout, _RenderStdout):
+                    sys.stdout = _RenderStdout(sys.stdout)
+
+                future = _render_executor.submit(
+                    _render_in_process, wireviz_api, yaml_content, yaml_path, output_dir
+                )
+                try:
+                    await asyncio.wait_for(
+                        asyncio.wrap_future(future),
+                        timeout=self.config.command_timeout
+                    )
+                except asyncio.TimeoutError:
+                    if not future.cancel():
+                        # Already running and threads can't be interrupted:
+                        # fail later renders fast instead of queueing them
+                        _stuck_render = future
+                    return TextContent(
+                        type="text",
+                        text=f"Error: WireViz timed out after {self.config.command_timeout} seconds"
+                    )
+                except Exception as e:
+                    error_msg = f"WireViz failed: {e}"
+                    log.error(error_msg)
+                    return TextContent(
+                        type="text",
+                        text=f"Error: {error_msg}"
+                    )
+                return None
+
+        cmd = [self.wireviz_path, str(yaml_path), "-o", str(output_dir), "-f", _WIREVIZ_FORMAT_CODES]
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            _, stderr_data = await asyncio.wait_for(
+                process.communicate(),
+                timeout=self.config.command_timeout
+            )
+        except asyncio.TimeoutError:
+            # The child watcher reaps it; process.wait() would also wait on
+            # pipes a still-running graphviz child may hold open
+            process.kill()
+            return TextContent(
+                type="text",
+                text=f"Error: WireViz timed out after {self.config.command_timeout} seconds"
+            )
+
+        if process.returncode != 0:
+            error_msg = f"WireViz failed: {stderr_data.decode(errors='replace')}"
+            log.error(error_msg)
+            return TextContent(
+                type="text",
+                text=f"Error: {error_msg}"
+            )
+
+        return None
+
+    def _store_cached_png(self, png_path: Path, cached_png: Path) -> None:
+        """Copy a fresh render into the disk cache, pruning least recently used"""
+        try:
+            cached_png.parent.mkdir(parents=True, exist_ok=True)
+            _link_or_copy(png_path, cached_png)
+
+            with os.scandir(cached_png.parent) as it:
+                entries = [e for e in it if e.name.endswith(".png")]
+            if len(entries) > _DISK_CACHE_SIZE:
+                entries.sort(key=lambda e: e.stat().st_mtime)
+                for entry in entries[:len(entries) - _DISK_CACHE_SIZE]:
+                    os.unlink(entry.path)
+        except OSError as e:
+            log.warning(f"Could not cache WireViz output: {e}")
+
+    def _prune_output_dirs(self) -> None:
+        """Remove least recently used output directories beyond the limit"""
+        try:
+            with os.scandir(self.sketches_base_dir) as it:
+                entries = [
+                    e for e in it
+                    if _OUTPUT_DIR_RE.fullmatch(e.name) and e.is_dir(follow_symlinks=False)
+                ]
+            if len(entries) > _OUTPUT_DIR_LIMIT:
+                entries.sort(key=lambda e: e.stat().st_mtime)
+                for entry in entries[:len(entries) - _OUTPUT_DIR_LIMIT]:
+                    shutil.rmtree(entry.path, ignore_errors=True)
+        except OSError as e:
+            log.warning(f"Could not prune WireViz output directories: {e}")
+
+    def _diagram_image(self, yaml_path: Path, png_path: Path, output_dir: Path) -> Image:
+        """Wrap a rendered diagram so FastMCP converts it to ImageContent"""
+        # FastMCP reads the file itself when building ImageContent, so the
+        # PNG is never held in memory here.
+        # Include path information in the image annotations
+        return Image(
+            path=png_path,
+            format="png",
+            annotations={
+                "description": f"Circuit diagram generated: {png_path}",
+                "paths": {
+                    "yaml": str(yaml_path),
+                    "png": str(png_path),
+                    "directory": str(output_dir)
+                }
+            }
+        )
+
+    def _create_wireviz_prompt(self, description: str, sketch_name: str) -> str:
+        """Create prompt for AI to generate WireViz YAML"""
+        prompt = _PROMPT_PREFIX + description
+
+        if sketch_name:
+            prompt += f"\n\nThis is for an Arduino sketch named: {sketch_name}"
+
+        return prompt
+
+    def _generate_template_yaml(self, description: str) -> str:
+        """Generate an intelligent template YAML based on keywords in the description
+
+        This provides better starting points when AI sampling isn't available.
+        """
+        return _template_yaml(description)
+
     def _clean_yaml_content(self, content: str) -> str:
         """Remove markdown code blocks if present"""
-        lines = content.strip().split('\n')
+        text = content.strip()
 
-        # Remove markdown code fence if present
-        if lines[0].startswith('```'):
-            lines = lines[1:]
-        if lines[-1].startswith('```'):
-            lines = lines[:-1]
+        # Remove markdown code fence if present, slicing instead of splitting
+        # the whole payload into lines
+        if text.startswith('```'):
+            first_nl = text.find('\n')
+            text = text[first_nl + 1:] if first_nl != -1 else ''
+        last_nl = text.rfind('\n')
+        if text.startswith('```', last_nl + 1):
+            text = text[:last_nl] if last_nl != -1 else ''
 
-        return '\n'.join(lines)
+        return text
 
     def _open_file(self, file_path: Path) -> None:
         """Open file in default system application"""
@@ -623,13 +860,21 @@ options:
             log.info(f"Skipping file opening for {file_path} (testing mode)")
             return
 
+        # Don't wait inline: the launcher (xdg-open in particular) can take
+        # a few hundred ms to exit and the viewer is not our concern
         try:
             if os.name == 'posix':  # macOS and Linux
                 if os.uname().sysname == 'Darwin':
-                    subprocess.run(['open', str(file_path)], check=False)
+                    proc = subprocess.Popen(['open', str(file_path)], **_LAUNCH_OPTIONS)
                 else:
-                    subprocess.run(['xdg-open', str(file_path)], check=False)
+                    proc = subprocess.Popen(['xdg-open', str(file_path)], **_LAUNCH_OPTIONS)
             elif os.name == 'nt':  # Windows
-                subprocess.run(['cmd', '/c', 'start', '', str(file_path)], check=False, shell=True)
+                proc = subprocess.Popen(['cmd', '/c', 'start', '', str(file_path)], shell=True, **_LAUNCH_OPTIONS)
+            else:
+                return
         except Exception as e:
             log.warning(f"Could not open file automatically: {e}")
+            return
+
+        # Reap the launcher in the background so it doesn't linger as a zombie
+        threading.Thread(target=proc.wait, name="wireviz-open", daemon=True).start()
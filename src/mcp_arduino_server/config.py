@@ -1,12 +1,32 @@
 """Configuration module for MCP Arduino Server"""
 from pathlib import Path
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+# Directories this process has already created. ensure_directories runs at
+# startup and again once MCP roots are known, usually for the same paths.
+# Concurrent callers can at worst repeat a harmless mkdir, so no lock
+_ensured_dirs: set[Path] = set()
+
+
+def make_directories(*dir_paths: Path) -> None:
+    """Create each directory (and parents) unless already done this process"""
+    for dir_path in dir_paths:
+        if dir_path in _ensured_dirs:
+            continue
+        # One stat when the directory exists (the usual case) instead of a
+        # failing mkdir followed by the stat that exist_ok does anyway
+        if not dir_path.is_dir():
+            dir_path.mkdir(parents=True, exist_ok=True)
+        _ensured_dirs.add(dir_path)
 
 
 class ArduinoServerConfig(BaseModel):
     """Central configuration for Arduino MCP Server"""
 
+    # Settings are fixed once the server starts; components read them freely
+    model_config = ConfigDict(frozen=True)
+
     # Arduino CLI settings
     arduino_cli_path: str = Field(
         default="arduino-cli",
@@ -55,9 +75,14 @@ class ArduinoServerConfig(BaseModel):
         description="Enable client-side LLM sampling for AI features"
     )
 
+    sampling_test_cache_ttl: float = Field(
+        default=600.0,
+        description="Seconds to reuse a successful client_test_sampling result"
+    )
+
     # Security settings
-    allowed_file_extensions: set[str] = Field(
-        default={".ino", ".cpp", ".c", ".h", ".hpp", ".yaml", ".yml", ".txt", ".md"},
+    allowed_file_extensions: frozenset[str] = Field(
+        default=frozenset({".ino", ".cpp", ".c", ".h", ".hpp", ".yaml", ".yml", ".txt", ".md"}),
         description="Allowed file extensions for operations"
     )
 
@@ -85,10 +110,9 @@ class ArduinoServerConfig(BaseModel):
 
     def ensure_directories(self) -> None:
         """Create necessary directories if they don't exist"""
-        for dir_path in [
+        make_directories(
             self.sketches_base_dir,
             self.build_temp_dir,
             self.arduino_data_dir,
             self.arduino_user_dir,
-        ]:
-            dir_path.mkdir(parents=True, exist_ok=True)
+        )
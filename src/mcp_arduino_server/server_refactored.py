@@ -9,6 +9,8 @@ import logging
 import os
 from pathlib import Path
 from typing import Any
+from urllib.parse import urlparse
+from urllib.request import url2pathname
 
 from fastmcp import Context, FastMCP
 
@@ -24,13 +26,21 @@ from .components.arduino_compile_advanced import ArduinoCompileAdvanced
 from .components.arduino_libraries_advanced import ArduinoLibrariesAdvanced
 from .components.arduino_serial import ArduinoSerial
 from .components.arduino_system_advanced import ArduinoSystemAdvanced
-from .config import ArduinoServerConfig
+from .config import ArduinoServerConfig, make_directories
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 log = logging.getLogger(__name__)
 
 
+def _file_uri_path(uri: str) -> Path | None:
+    """Local path for a file:// URI (percent-decoded), None for other schemes"""
+    parsed = urlparse(uri)
+    if parsed.scheme != 'file':
+        return None
+    return Path(url2pathname(parsed.path))
+
+
 class RootsAwareConfig:
     """Wrapper that enhances config with MCP roots support"""
 
@@ -44,7 +54,11 @@ class RootsAwareConfig:
         """Initialize with MCP context to get roots"""
         try:
             # Try to get roots from context
-            self._roots = await ctx.list_roots()
+            # Roots arrive as mcp.types.Root models; keep plain dicts
+            self._roots = [
+                root if isinstance(root, dict) else root.model_dump(mode="json")
+                for root in await ctx.list_roots()
+            ]
 
             if self._roots:
                 log.info(f"Found {len(self._roots)} MCP roots from client")
@@ -73,15 +87,13 @@ class RootsAwareConfig:
         # Priority order for root selection
         for root in self._roots:
             try:
-                root_name = root.get('name', '').lower()
-                root_uri = root.get('uri', '')
+                root_name = (root.get('name') or '').lower()
 
                 # Skip non-file URIs
-                if not root_uri.startswith('file://'):
+                root_path = _file_uri_path(root.get('uri', ''))
+                if root_path is None:
                     continue
 
-                root_path = Path(root_uri.replace('file://', ''))
-
                 # Priority 1: Root named 'arduino' or containing 'arduino'
                 if 'arduino' in root_name:
                     log.info(f"Selected Arduino-specific root: {root_name}")
@@ -99,9 +111,8 @@ class RootsAwareConfig:
         # Use first available root as fallback
         if self._roots:
             first_root = self._roots[0]
-            root_uri = first_root.get('uri', '')
-            if root_uri.startswith('file://'):
-                root_path = Path(root_uri.replace('file://', ''))
+            root_path = _file_uri_path(first_root.get('uri', ''))
+            if root_path is not None:
                 log.info(f"Using first available root: {first_root.get('name')}")
                 return root_path / 'Arduino_Sketches'
 
@@ -134,10 +145,12 @@ class RootsAwareConfig:
 
     def ensure_directories(self) -> None:
         """Ensure all directories exist"""
-        self.sketches_base_dir.mkdir(parents=True, exist_ok=True)
-        self.build_temp_dir.mkdir(parents=True, exist_ok=True)
-        self.base_config.arduino_data_dir.mkdir(parents=True, exist_ok=True)
-        self.base_config.arduino_user_dir.mkdir(parents=True, exist_ok=True)
+        make_directories(
+            self.sketches_base_dir,
+            self.build_temp_dir,
+            self.base_config.arduino_data_dir,
+            self.base_config.arduino_user_dir,
+        )
 
     def get_roots_info(self) -> str:
         """Get information about roots configuration"""
@@ -146,7 +159,7 @@ class RootsAwareConfig:
         if self._roots:
             info.append(f"MCP Roots Available: {len(self._roots)}")
             for root in self._roots:
-                name = root.get('name', 'unnamed')
+                name = root.get('name') or 'unnamed'
                 uri = root.get('uri', 'unknown')
                 info.append(f"  - {name}: {uri}")
         else:
@@ -175,7 +188,8 @@ def create_server(config: ArduinoServerConfig | None = None) -> FastMCP:
     using the component pattern with automatic MCP roots detection.
     """
     if config is None:
-        config = ArduinoServerConfig()
+        # Defaults are trusted; skip validation
+        config = ArduinoServerConfig.model_construct()
 
     # Wrap config with roots awareness
     roots_config = RootsAwareConfig(config)
@@ -382,14 +396,20 @@ def create_server(config: ArduinoServerConfig | None = None) -> FastMCP:
 - server://info: This information
 """
 
-    # Log startup info
-    log.info(f"🚀 Arduino Development Server v{package_version} initialized")
-    log.info(f"📁 Sketch directory: {config.sketches_base_dir}")
-    log.info(f"🔧 Arduino CLI: {config.arduino_cli_path}")
-    log.info("📚 Components loaded: Sketch, Library, Board, Debug, WireViz, Serial Monitor")
-    log.info("📡 Serial monitoring: Enabled with cursor-based streaming")
-    log.info(f"🤖 Client sampling: {'Enabled' if roots_config.enable_client_sampling else 'Disabled'}")
-    log.info("📁 MCP Roots: Will be auto-detected on first tool use")
+    # Log startup info as one record: one handler write instead of seven
+    log.info(
+        "🚀 Arduino Development Server v%s initialized\n"
+        "📁 Sketch directory: %s\n"
+        "🔧 Arduino CLI: %s\n"
+        "📚 Components loaded: Sketch, Library, Board, Debug, WireViz, Serial Monitor\n"
+        "📡 Serial monitoring: Enabled with cursor-based streaming\n"
+        "🤖 Client sampling: %s\n"
+        "📁 MCP Roots: Will be auto-detected on first tool use",
+        package_version,
+        config.sketches_base_dir,
+        config.arduino_cli_path,
+        "Enabled" if roots_config.enable_client_sampling else "Disabled",
+    )
 
     # Add resource for roots configuration
     @mcp.resource(uri="arduino://roots")
@@ -414,16 +434,21 @@ def main():
         print(f"mcp-arduino {package_version}")
         sys.exit(0)
 
-    config = ArduinoServerConfig()
-
     # Override from environment if set
+    overrides: dict[str, Any] = {}
     if env_sketch_dir := os.getenv("MCP_SKETCH_DIR"):
-        config.sketches_base_dir = Path(env_sketch_dir).expanduser()
-        log.info(f"Using MCP_SKETCH_DIR: {config.sketches_base_dir}")
+        overrides["sketches_base_dir"] = Path(env_sketch_dir).expanduser()
+        log.info(f"Using MCP_SKETCH_DIR: {overrides['sketches_base_dir']}")
 
     if env_cli_path := os.getenv("ARDUINO_CLI_PATH"):
-        config.arduino_cli_path = env_cli_path
-        log.info(f"Using ARDUINO_CLI_PATH: {config.arduino_cli_path}")
+        overrides["arduino_cli_path"] = env_cli_path
+        log.info(f"Using ARDUINO_CLI_PATH: {env_cli_path}")
+
+    # Validate only when environment values are involved
+    config = (
+        ArduinoServerConfig(**overrides) if overrides
+        else ArduinoServerConfig.model_construct()
+    )
 
     # Create and run the server with automatic roots detection
     mcp = create_server(config)
@@ -0,0 +1,252 @@
+"""
+Tests for the serial monitor's SerialDataBuffer
+"""
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from mcp_arduino_server.components.serial_monitor import SerialDataBuffer, SerialDataType
+
+
+class _CountingList(list):
+    """List that counts positional reads, to check how much a read walks"""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.reads = 0
+
+    def __getitem__(self, key):
+        self.reads += 1
+        return super().__getitem__(key)
+
+
+def _count_reads(log) -> _CountingList:
+    """Swap an _EntryLog's storage for a counting list"""
+    log._items = _CountingList(log._items)
+    return log._items
+
+
+class TestSerialDataBufferPaging:
+    """Reads must cost the page they return, not the buffer length"""
+
+    @pytest.fixture
+    def full_buffer(self):
+        buffer = SerialDataBuffer(max_size=10000)
+        # Wrap around several times so the head offset is non-zero
+        for i in range(25000):
+            buffer.add_entry("/dev/ttyUSB0" if i % 2 else "/dev/ttyUSB1", f"line {i}")
+        return buffer
+
+    def test_unfiltered_tail_read_walks_one_page(self, full_buffer):
+        items = _count_reads(full_buffer.buffer)
+        cursor = full_buffer.cursor_at(full_buffer.global_index - 50)
+
+        entries, has_more, next_cursor = full_buffer.read_from_cursor(cursor, limit=10)
+
+        assert [e.index for e in entries] == list(range(24950, 24960))
+        assert has_more
+        assert next_cursor == full_buffer.cursor_at(24960)
+        assert items.reads <= 15
+
+    def test_filtered_tail_read_walks_one_page(self, full_buffer):
+        port_log = full_buffer._by_port["/dev/ttyUSB0"]
+        items = _count_reads(port_log)
+        cursor = full_buffer.cursor_at(full_buffer.global_index - 50)
+
+        entries, _, _ = full_buffer.read_from_cursor(cursor, limit=10, port_filter="/dev/ttyUSB0")
+
+        assert [e.index for e in entries] == list(range(24951, 24971, 2))
+        # Binary search plus the page itself
+        assert items.reads <= 10 + 2 * len(port_log).bit_length()
+
+    def test_read_after_port_clear_bisects(self, full_buffer):
+        full_buffer.clear("/dev/ttyUSB1")
+        items = _count_reads(full_buffer.buffer)
+        cursor = full_buffer.cursor_at(full_buffer.global_index - 50)
+
+        entries, _, _ = full_buffer.read_from_cursor(cursor, limit=10)
+
+        assert [e.index for e in entries] == list(range(24951, 24971, 2))
+        assert items.reads <= 10 + 2 * len(full_buffer.buffer).bit_length()
+
+
+class TestSerialDataBufferEviction:
+    """Entries are evicted oldest-first by count and by total size"""
+
+    def test_evicts_by_count(self):
+        buffer = SerialDataBuffer(max_size=5)
+        for i in range(8):
+            buffer.add_entry("/dev/ttyUSB0", f"line {i}")
+
+        assert [e.index for e in buffer.buffer] == [3, 4, 5, 6, 7]
+        assert buffer.total_bytes == sum(len(f"line {i}") for i in range(3, 8))
+        assert [e.index for e in buffer._by_port["/dev/ttyUSB0"]] == [3, 4, 5, 6, 7]
+
+    def test_evicts_by_bytes(self):
+        buffer = SerialDataBuffer(max_size=100, max_bytes=10)
+        for data in ["aaaa", "bbbb", "cccc"]:
+            buffer.add_entry("/dev/ttyUSB0", data)
+
+        assert [e.data for e in buffer.buffer] == ["bbbb", "cccc"]
+        assert buffer.total_bytes == 8
+
+    def test_burst_keeps_newest_within_limits(self):
+        buffer = SerialDataBuffer(max_size=3, max_bytes=100)
+        buffer.add_entry("/dev/ttyUSB0", "old")
+        buffer.add_entries("/dev/ttyUSB0", [f"burst {i}" for i in range(5)])
+
+        assert [e.data for e in buffer.buffer] == ["burst 2", "burst 3", "burst 4"]
+        assert [e.index for e in buffer.buffer] == [3, 4, 5]
+        assert buffer.total_bytes == 3 * len("burst 0")
+
+
+class TestSerialDataBufferCursors:
+    """Cursors are position tokens that survive eviction and clears"""
+
+    def test_cursor_pages_through_buffer(self):
+        buffer = SerialDataBuffer()
+        for i in range(5):
+            buffer.add_entry("/dev/ttyUSB0", f"line {i}")
+
+        cursor = buffer.create_cursor()
+        entries, has_more, cursor = buffer.read_from_cursor(cursor, limit=3)
+        assert [e.index for e in entries] == [0, 1, 2]
+        assert has_more
+
+        entries, has_more, cursor = buffer.read_from_cursor(cursor, limit=3)
+        assert [e.index for e in entries] == [3, 4]
+        assert not has_more
+
+        # Nothing new: the same cursor comes back
+        entries, has_more, same_cursor = buffer.read_from_cursor(cursor, limit=3)
+        assert entries == []
+        assert same_cursor == cursor
+
+    def test_cursor_after_eviction_resumes_at_oldest(self):
+        buffer = SerialDataBuffer(max_size=3)
+        buffer.add_entry("/dev/ttyUSB0", "line 0")
+        cursor = buffer.create_cursor()
+        for i in range(1, 6):
+            buffer.add_entry("/dev/ttyUSB0", f"line {i}")
+
+        entries, has_more, _ = buffer.read_from_cursor(cursor)
+        assert [e.index for e in entries] == [3, 4, 5]
+        assert not has_more
+
+    def test_cursor_after_port_clear(self):
+        buffer = SerialDataBuffer()
+        for i in range(6):
+            buffer.add_entry("/dev/ttyUSB0" if i % 2 else "/dev/ttyUSB1", f"line {i}")
+        cursor = buffer.cursor_at(2)
+
+        buffer.clear("/dev/ttyUSB1")
+
+        entries, _, next_cursor = buffer.read_from_cursor(cursor)
+        assert [e.index for e in entries] == [3, 5]
+        assert next_cursor == buffer.cursor_at(6)
+        assert "/dev/ttyUSB1" not in buffer._by_port
+        assert buffer.total_bytes == sum(len(e.data) for e in entries) + len("line 1")
+
+    def test_cursor_after_full_clear(self):
+        buffer = SerialDataBuffer()
+        buffer.add_entry("/dev/ttyUSB0", "before")
+        cursor = buffer.create_cursor()
+        buffer.clear()
+        buffer.add_entry("/dev/ttyUSB0", "after")
+
+        entries, _, _ = buffer.read_from_cursor(cursor)
+        assert [e.data for e in entries] == ["after"]
+
+    def test_malformed_cursor_reads_nothing(self):
+        buffer = SerialDataBuffer()
+        buffer.add_entry("/dev/ttyUSB0", "line")
+
+        for cursor in ["", "uuid-here", "c:", "c:abc", "x:0"]:
+            entries, has_more, _ = buffer.read_from_cursor(cursor)
+            assert entries == []
+            assert not has_more
+
+
+class TestSerialDataBufferFilters:
+    """Port and type filters only return matching entries"""
+
+    @pytest.fixture
+    def mixed_buffer(self):
+        buffer = SerialDataBuffer()
+        buffer.add_entry("/dev/ttyUSB0", "hello", SerialDataType.RECEIVED)
+        buffer.add_entry("/dev/ttyUSB1", "ping", SerialDataType.SENT)
+        buffer.add_entry("/dev/ttyUSB0", "cmd", SerialDataType.SENT)
+        buffer.add_entry("/dev/ttyUSB1", "pong", SerialDataType.RECEIVED)
+        buffer.add_entry("/dev/ttyUSB0", "oops", SerialDataType.ERROR)
+        return buffer
+
+    def test_port_filter(self, mixed_buffer):
+        cursor = mixed_buffer.create_cursor()
+        entries, _, _ = mixed_buffer.read_from_cursor(cursor, port_filter="/dev/ttyUSB0")
+        assert [e.data for e in entries] == ["hello", "cmd", "oops"]
+
+    def test_type_filter(self, mixed_buffer):
+        cursor = mixed_buffer.create_cursor()
+        entries, _, _ = mixed_buffer.read_from_cursor(cursor, type_filter=SerialDataType.SENT)
+        assert [e.data for e in entries] == ["ping", "cmd"]
+
+    def test_port_and_type_filter(self, mixed_buffer):
+        cursor = mixed_buffer.create_cursor()
+        entries, _, _ = mixed_buffer.read_from_cursor(
+            cursor, port_filter="/dev/ttyUSB1", type_filter=SerialDataType.RECEIVED
+        )
+        assert [e.data for e in entries] == ["pong"]
+
+    def test_unknown_port_filter(self, mixed_buffer):
+        cursor = mixed_buffer.create_cursor()
+        entries, has_more, _ = mixed_buffer.read_from_cursor(cursor, port_filter="/dev/ttyACM0")
+        assert entries == []
+        assert not has_more
+
+    def test_get_latest_by_port(self, mixed_buffer):
+        assert [e.data for e in mixed_buffer.get_latest("/dev/ttyUSB1", limit=1)] == ["pong"]
+        assert [e.data for e in mixed_buffer.get_latest(limit=2)] == ["pong", "oops"]
+
+
+class TestSerialDataBufferReceive:
+    """Received lines are batched per burst without losing arrival order"""
+
+    async def test_burst_is_indexed_on_next_tick(self):
+        buffer = SerialDataBuffer()
+        buffer.receive("/dev/ttyUSB0", "a")
+        buffer.receive("/dev/ttyUSB0", "b")
+        assert len(buffer.buffer) == 0
+
+        await asyncio.sleep(0)
+
+        assert [(e.index, e.data) for e in buffer.buffer] == [(0, "a"), (1, "b")]
+
+    async def test_add_entry_flushes_earlier_received_lines(self):
+        buffer = SerialDataBuffer()
+        buffer.receive("/dev/ttyUSB0", "boot")
+        buffer.receive("/dev/ttyUSB1", "other port")
+        buffer.add_entry("/dev/ttyUSB0", "cmd", SerialDataType.SENT)
+        buffer.add_entry("/dev/ttyUSB0", "Disconnected", SerialDataType.SYSTEM)
+        await asyncio.sleep(0)
+
+        assert [e.data for e in buffer.buffer] == ["boot", "other port", "cmd", "Disconnected"]
+        assert [e.index for e in buffer.buffer] == [0, 1, 2, 3]
+
+    async def test_reads_see_pending_lines(self):
+        buffer = SerialDataBuffer()
+        cursor = buffer.create_cursor()
+        buffer.receive("/dev/ttyUSB0", "line")
+
+        entries, _, _ = buffer.read_from_cursor(cursor)
+        assert [e.data for e in entries] == ["line"]
+        assert [e.data for e in buffer.get_latest("/dev/ttyUSB0")] == ["line"]
+
+    async def test_burst_keeps_receive_time(self):
+        buffer = SerialDataBuffer()
+        with patch("time.time_ns", return_value=1_000):
+            buffer.receive("/dev/ttyUSB0", "line")
+        with patch("time.time_ns", return_value=2_000):
+            buffer.add_entry("/dev/ttyUSB0", "cmd", SerialDataType.SENT)
+
+        assert [e.timestamp_ns for e in buffer.buffer] == [1_000, 2_000]
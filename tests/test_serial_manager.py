@@ -0,0 +1,279 @@
+"""
+Tests for the serial connection manager
+"""
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from mcp_arduino_server.components.serial_manager import (
+    ConnectionState,
+    SerialConnection,
+    SerialConnectionManager,
+)
+
+PORT = "/dev/ttyUSB0"
+
+
+@pytest.fixture
+async def reader():
+    """Stream the connection reads from; tests feed it device output"""
+    return asyncio.StreamReader()
+
+
+@pytest.fixture
+def writer():
+    """Writer stand-in that records what the connection sends"""
+    writer = Mock()
+    writer.drain = AsyncMock()
+    writer.wait_closed = AsyncMock()
+    return writer
+
+
+@pytest.fixture
+def connection(reader, writer):
+    """A connected SerialConnection on fake streams"""
+    return SerialConnection(
+        port=PORT,
+        state=ConnectionState.CONNECTED,
+        reader=reader,
+        writer=writer,
+        max_buffer_size=10,
+    )
+
+
+@pytest.fixture
+async def manager(connection):
+    """A running manager holding the fake connection, without port discovery"""
+    manager = SerialConnectionManager()
+    manager._running = True
+    manager.auto_reconnect = False
+    manager.connections[PORT] = connection
+    yield manager
+    manager._running = False
+    for port in list(manager.connections):
+        await manager.disconnect(port)
+
+
+class TestSendCommandWhileMonitoring:
+    """send_command on a monitored port receives lines through a listener queue"""
+
+    async def test_response_arrives_through_listener(self, manager, connection, reader, writer):
+        readers = []
+        original_readline = SerialConnection.readline
+
+        async def tracking_readline(self):
+            readers.append(asyncio.current_task())
+            return await original_readline(self)
+
+        writer.write.side_effect = lambda data: reader.feed_data(b"value=42\nOK\n")
+
+        with patch.object(SerialConnection, "readline", tracking_readline):
+            await manager.start_monitoring(PORT)
+            response = await manager.send_command(PORT, "read", timeout=1.0)
+
+        assert response == "value=42\nOK"
+        writer.write.assert_called_once_with(b"read\n")
+        # Only the monitor task touched the reader
+        assert readers
+        assert all(task is manager.monitoring_tasks[PORT] for task in readers)
+        assert not connection._line_queues
+        assert not connection.listeners
+
+    async def test_disconnect_ends_wait(self, manager, connection):
+        await manager.start_monitoring(PORT)
+        started = time.monotonic()
+        pending = asyncio.create_task(manager.send_command(PORT, "read", timeout=5.0))
+        await asyncio.sleep(0.01)
+
+        await manager.disconnect(PORT)
+
+        assert await pending is None
+        assert time.monotonic() - started < 1.0
+
+    async def test_read_error_ends_wait(self, manager, connection, reader):
+        await manager.start_monitoring(PORT)
+        started = time.monotonic()
+        pending = asyncio.create_task(manager.send_command(PORT, "read", timeout=5.0))
+        await asyncio.sleep(0.01)
+
+        reader.set_exception(OSError("device unplugged"))
+
+        assert await pending is None
+        assert time.monotonic() - started < 1.0
+        assert connection.state == ConnectionState.ERROR
+
+
+class TestListenerDispatch:
+    """Coroutine listeners are fed from a bounded backlog"""
+
+    async def test_coroutine_listeners_receive_lines_in_order(self, connection, reader):
+        received = []
+
+        async def listener(line):
+            await asyncio.sleep(0)
+            received.append(line)
+
+        connection.add_listener(listener)
+        reader.feed_data(b"".join(b"line %d\n" % i for i in range(5)))
+        for _ in range(5):
+            await connection.readline()
+
+        await connection.dispatch_drained.wait()
+        assert received == [f"line {i}" for i in range(5)]
+        assert connection.dropped_lines == 0
+
+    async def test_lines_dropped_past_high_water_mark(self, connection, reader):
+        release = asyncio.Event()
+        received = []
+
+        async def slow_listener(line):
+            await release.wait()
+            received.append(line)
+
+        connection.add_listener(slow_listener)
+        # Buffered lines are read without yielding, so the backlog fills up
+        reader.feed_data(b"".join(b"line %d\n" % i for i in range(15)))
+        for _ in range(15):
+            await connection.readline()
+
+        # max_buffer_size is 10, so the backlog stops at 9 lines
+        assert connection.dropped_lines == 6
+        assert connection._dropping
+        assert not connection.dispatch_drained.is_set()
+
+        release.set()
+        await connection.dispatch_drained.wait()
+        assert received == [f"line {i}" for i in range(9)]
+
+    async def test_drop_mode_resets_after_drain(self, connection, reader):
+        release = asyncio.Event()
+        received = []
+
+        async def slow_listener(line):
+            await release.wait()
+            received.append(line)
+
+        connection.add_listener(slow_listener)
+        reader.feed_data(b"".join(b"line %d\n" % i for i in range(12)))
+        for _ in range(12):
+            await connection.readline()
+        release.set()
+        await connection.dispatch_drained.wait()
+
+        assert not connection._dropping
+        reader.feed_data(b"after\n")
+        await connection.readline()
+        await connection.dispatch_drained.wait()
+        assert received[-1] == "after"
+        assert connection.dropped_lines == 3
+
+    async def test_disconnect_cancels_dispatch(self, manager, connection, reader):
+        received = []
+
+        async def stuck_listener(line):
+            await asyncio.Event().wait()
+            received.append(line)
+
+        connection.add_listener(stuck_listener)
+        reader.feed_data(b"a\nb\nc\n")
+        for _ in range(3):
+            await connection.readline()
+        await asyncio.sleep(0)
+        dispatch_task = connection._dispatch_task
+
+        await manager.disconnect(PORT)
+
+        assert dispatch_task.cancelled()
+        assert connection._dispatch_task is None
+        assert not connection._dispatch_backlog
+        assert connection.dispatch_drained.is_set()
+        assert received == []
+
+
+class _FakeSerial:
+    """pyserial stand-in that records which thread touches it"""
+
+    def __init__(self, *args):
+        self.args = args
+        self.events = [("open", threading.get_ident())] if args else []
+
+    @property
+    def dtr(self):
+        return True
+
+    @dtr.setter
+    def dtr(self, value):
+        self.events.append((f"dtr={value}", threading.get_ident()))
+
+    @property
+    def rts(self):
+        return True
+
+    @rts.setter
+    def rts(self, value):
+        self.events.append((f"rts={value}", threading.get_ident()))
+
+    def close(self):
+        self.events.append(("close", threading.get_ident()))
+
+
+class TestResetBoard:
+    """reset_board keeps pyserial calls on the live handle on the loop thread"""
+
+    @pytest.fixture(autouse=True)
+    def no_settle_delay(self):
+        real_sleep = asyncio.sleep
+
+        async def no_delay(delay):
+            await real_sleep(0)
+
+        with patch("asyncio.sleep", no_delay):
+            yield
+
+    async def test_dtr_toggles_live_handle_on_loop_thread(self, manager, writer):
+        live = _FakeSerial()
+        writer.transport.serial = live
+
+        with patch("serial.Serial") as mock_serial:
+            assert await manager.reset_board(PORT, "dtr")
+
+        mock_serial.assert_not_called()
+        loop_thread = threading.get_ident()
+        assert live.events == [("dtr=False", loop_thread), ("dtr=True", loop_thread)]
+
+    async def test_fresh_port_opens_and_closes_in_thread(self):
+        manager = SerialConnectionManager()
+        opened = []
+
+        def open_port(*args):
+            opened.append(_FakeSerial(*args))
+            return opened[-1]
+
+        with patch("serial.Serial", side_effect=open_port):
+            assert await manager.reset_board(PORT, "rts")
+
+        loop_thread = threading.get_ident()
+        (fresh,) = opened
+        assert fresh.args == (PORT, 115200)
+        assert [name for name, _ in fresh.events] == ["open", "rts=False", "rts=True", "close"]
+        assert fresh.events[0][1] != loop_thread
+        assert fresh.events[1][1] == fresh.events[2][1] == loop_thread
+        assert fresh.events[3][1] != loop_thread
+
+    async def test_1200bps_touch(self):
+        manager = SerialConnectionManager()
+        opened = []
+
+        def open_port(*args):
+            opened.append(_FakeSerial(*args))
+            return opened[-1]
+
+        with patch("serial.Serial", side_effect=open_port):
+            assert await manager.reset_board(PORT, "1200bps")
+
+        (touch,) = opened
+        assert touch.args == (PORT, 1200)
+        assert [name for name, _ in touch.events] == ["open", "close"]
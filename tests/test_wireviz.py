@@ -1,12 +1,20 @@
 """
 Tests for WireViz component
 """
+import asyncio
+import hashlib
 import os
 import subprocess
+import sys
+import threading
+import types
 from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
+from fastmcp.utilities.types import Image
+from mcp.types import TextContent
 
+from src.mcp_arduino_server.components import wireviz as wireviz_module
 from src.mcp_arduino_server.components.wireviz import WireViz, WireVizRequest
 
 
@@ -53,105 +61,83 @@ connections:
         return png_data
 
     @pytest.mark.asyncio
-    async def test_generate_from_yaml_success(self, wireviz_component, test_context, temp_dir, sample_yaml_content, mock_png_image):
+    async def test_generate_from_yaml_success(self, wireviz_component, temp_dir, sample_yaml_content, fake_render):
         """Test successful circuit diagram generation from YAML"""
-        # Set up temp directory
         wireviz_component.sketches_base_dir = temp_dir
+        digest = hashlib.blake2b(sample_yaml_content.encode(), digest_size=16).hexdigest()
+        output_dir = temp_dir / f"wireviz_{digest[:12]}"
 
-        # Mock WireViz subprocess
-        with patch('subprocess.run') as mock_subprocess:
-            mock_subprocess.return_value.returncode = 0
-            mock_subprocess.return_value.stderr = ""
-
-            # Create a mock PNG file that will be "generated"
-            with patch('datetime.datetime') as mock_datetime:
-                mock_datetime.now.return_value.strftime.return_value = "20240101_120000"
-
-                # Pre-create the output directory and PNG file
-                output_dir = temp_dir / "wireviz_20240101_120000"
-                output_dir.mkdir(parents=True, exist_ok=True)
-                png_file = output_dir / "circuit.png"
-                png_file.write_bytes(mock_png_image)
-
-                # Mock file opening
-                with patch.object(wireviz_component, '_open_file') as mock_open:
-                    result = await wireviz_component.generate_from_yaml(
-                        yaml_content=sample_yaml_content,
-                        output_base="circuit"
-                    )
-
-            assert result["success"] is True
-            assert "Circuit diagram generated" in result["message"]
-            assert "image" in result
-            assert isinstance(result["image"], type(result["image"]))  # Check it's an Image object
-            assert "paths" in result
-            assert "yaml" in result["paths"]
-            assert "png" in result["paths"]
-            assert "directory" in result["paths"]
-
-            # Verify WireViz was called with correct arguments
-            mock_subprocess.assert_called_once()
-            call_args = mock_subprocess.call_args[0][0]
-            assert wireviz_component.wireviz_path in call_args
-            assert "-o" in call_args
+        # Mock file opening
+        with patch.object(wireviz_component, '_open_file') as mock_open:
+            result = await wireviz_component.generate_from_yaml(
+                yaml_content=sample_yaml_content,
+                output_base="circuit"
+            )
 
-            # Verify file opening was attempted
-            mock_open.assert_called_once()
+        assert isinstance(result, Image)
+        assert result.path == output_dir / "circuit.png"
+        assert "Circuit diagram generated" in result.annotations["description"]
+        assert result.annotations["paths"] == {
+            "yaml": str(output_dir / "circuit.yaml"),
+            "png": str(output_dir / "circuit.png"),
+            "directory": str(output_dir),
+        }
 
-    @pytest.mark.asyncio
-    async def test_generate_from_yaml_wireviz_failure(self, wireviz_component, temp_dir, sample_yaml_content):
-        """Test WireViz subprocess failure"""
-        wireviz_component.sketches_base_dir = temp_dir
+        # Verify WireViz was run on the YAML written to the output directory
+        fake_render.assert_called_once_with(output_dir / "circuit.yaml", output_dir, sample_yaml_content)
 
-        with patch('subprocess.run') as mock_subprocess:
-            mock_subprocess.return_value.returncode = 1
-            mock_subprocess.return_value.stderr = "Invalid YAML syntax"
+        # Verify file opening was attempted
+        mock_open.assert_called_once_with(output_dir / "circuit.png")
 
-            result = await wireviz_component.generate_from_yaml(
-                yaml_content=sample_yaml_content
-            )
-
-            assert "error" in result
-            assert "WireViz failed" in result["error"]
-            assert "Invalid YAML syntax" in result["error"]
+        # The render is kept in the disk cache for later runs
+        assert (temp_dir / ".wireviz_cache" / f"{digest}.png").exists()
 
     @pytest.mark.asyncio
-    async def test_generate_from_yaml_no_png_generated(self, wireviz_component, temp_dir, sample_yaml_content):
-        """Test when WireViz succeeds but no PNG is generated"""
+    async def test_generate_from_yaml_wireviz_failure(self, wireviz_component, temp_dir, sample_yaml_content, fake_wireviz):
+        """Test WireViz render failure"""
         wireviz_component.sketches_base_dir = temp_dir
+        fake_wireviz.parse.side_effect = ValueError("Invalid YAML syntax")
 
-        with patch('subprocess.run') as mock_subprocess:
-            mock_subprocess.return_value.returncode = 0
-            mock_subprocess.return_value.stderr = ""
+        result = await wireviz_component.generate_from_yaml(
+            yaml_content=sample_yaml_content
+        )
 
-            with patch('datetime.datetime') as mock_datetime:
-                mock_datetime.now.return_value.strftime.return_value = "20240101_120000"
+        assert isinstance(result, TextContent)
+        assert "WireViz failed" in result.text
+        assert "Invalid YAML syntax" in result.text
+        assert not (temp_dir / ".wireviz_cache").exists()
 
-                # Create output directory but no PNG file
-                output_dir = temp_dir / "wireviz_20240101_120000"
-                output_dir.mkdir(parents=True, exist_ok=True)
+    @pytest.mark.asyncio
+    async def test_generate_from_yaml_no_png_generated(self, wireviz_component, temp_dir, sample_yaml_content, fake_wireviz):
+        """Test when WireViz succeeds but no PNG is generated"""
+        wireviz_component.sketches_base_dir = temp_dir
+        fake_wireviz.parse.side_effect = None
 
-                result = await wireviz_component.generate_from_yaml(
-                    yaml_content=sample_yaml_content
-                )
+        result = await wireviz_component.generate_from_yaml(
+            yaml_content=sample_yaml_content
+        )
 
-            assert "error" in result
-            assert "No PNG file generated" in result["error"]
+        assert isinstance(result, TextContent)
+        assert "No PNG file generated" in result.text
 
     @pytest.mark.asyncio
     async def test_generate_from_yaml_timeout(self, wireviz_component, temp_dir, sample_yaml_content):
-        """Test WireViz timeout handling"""
+        """Test WireViz CLI timeout handling"""
         wireviz_component.sketches_base_dir = temp_dir
+        # An explicit wireviz_path runs the CLI instead of rendering in-process
+        wireviz_component.wireviz_path = "/opt/wireviz/bin/wireviz"
 
-        with patch('subprocess.run') as mock_subprocess:
-            mock_subprocess.side_effect = subprocess.TimeoutExpired("wireviz", 30)
-
+        process = Mock()
+        process.communicate = AsyncMock(side_effect=asyncio.TimeoutError)
+        with patch('asyncio.create_subprocess_exec', AsyncMock(return_value=process)) as mock_exec:
             result = await wireviz_component.generate_from_yaml(
                 yaml_content=sample_yaml_content
             )
 
-            assert "error" in result
-            assert "WireViz timed out" in result["error"]
+        assert isinstance(result, TextContent)
+        assert "WireViz timed out" in result.text
+        assert mock_exec.call_args[0][0] == "/opt/wireviz/bin/wireviz"
+        process.kill.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_generate_from_description_success(self, wireviz_component, test_context, temp_dir, mock_png_image):
@@ -377,7 +363,7 @@ connectors:
 
         with patch('os.name', 'posix'), \
              patch('os.uname') as mock_uname, \
-             patch('subprocess.run') as mock_subprocess, \
+             patch('subprocess.Popen') as mock_subprocess, \
              patch.dict(os.environ, {'TESTING_MODE': '0'}):
 
             mock_uname.return_value.sysname = 'Linux'
@@ -396,7 +382,7 @@ connectors:
 
         with patch('os.name', 'posix'), \
              patch('os.uname') as mock_uname, \
-             patch('subprocess.run') as mock_subprocess, \
+             patch('subprocess.Popen') as mock_subprocess, \
              patch.dict(os.environ, {'TESTING_MODE': '0'}):
 
             mock_uname.return_value.sysname = 'Darwin'
@@ -414,7 +400,7 @@ connectors:
         test_file.write_text("fake image")
 
         with patch('os.name', 'nt'), \
-             patch('subprocess.run') as mock_subprocess, \
+             patch('subprocess.Popen') as mock_subprocess, \
              patch.dict(os.environ, {'TESTING_MODE': '0'}):
 
             wireviz_component._open_file(test_file)
@@ -426,12 +412,32 @@ connectors:
             assert 'start' in call_args
             assert str(test_file) in call_args
 
+    def test_open_file_reaps_launcher(self, wireviz_component, temp_dir):
+        """Test the launcher process is waited on in the background"""
+        test_file = temp_dir / "test.png"
+        test_file.write_text("fake image")
+
+        with patch('os.name', 'posix'), \
+             patch('os.uname') as mock_uname, \
+             patch('subprocess.Popen') as mock_subprocess, \
+             patch('threading.Thread') as mock_thread, \
+             patch.dict(os.environ, {'TESTING_MODE': '0'}):
+
+            mock_uname.return_value.sysname = 'Linux'
+
+            wireviz_component._open_file(test_file)
+
+            mock_thread.assert_called_once()
+            assert mock_thread.call_args.kwargs['target'] == mock_subprocess.return_value.wait
+            assert mock_thread.call_args.kwargs['daemon'] is True
+            mock_thread.return_value.start.assert_called_once()
+
     def test_open_file_error_handling(self, wireviz_component, temp_dir, caplog):
         """Test file opening error handling"""
         test_file = temp_dir / "nonexistent.png"
 
         with patch('os.name', 'posix'), \
-             patch('subprocess.run') as mock_subprocess, \
+             patch('subprocess.Popen') as mock_subprocess, \
              patch.dict(os.environ, {'TESTING_MODE': '0'}):
 
             mock_subprocess.side_effect = Exception("Command failed")
@@ -465,33 +471,61 @@ connectors:
         assert minimal_request.output_base == "circuit"
 
     @pytest.mark.asyncio
-    async def test_generate_from_yaml_creates_timestamped_directory(self, wireviz_component, temp_dir, sample_yaml_content, mock_png_image):
-        """Test that generate_from_yaml creates unique timestamped directories"""
+    async def test_generate_from_yaml_names_directory_by_content_hash(self, wireviz_component, temp_dir, sample_yaml_content, fake_render):
+        """Test that output directories are named by a hash of the YAML"""
         wireviz_component.sketches_base_dir = temp_dir
+        digest = hashlib.blake2b(sample_yaml_content.encode(), digest_size=16).hexdigest()
+        changed_yaml = sample_yaml_content + "\n# changed"
+        changed_digest = hashlib.blake2b(changed_yaml.encode(), digest_size=16).hexdigest()
 
-        with patch('subprocess.run') as mock_subprocess, \
-             patch.object(wireviz_component, '_open_file'):
+        with patch.object(wireviz_component, '_open_file'):
+            result = await wireviz_component.generate_from_yaml(yaml_content=sample_yaml_content)
+            changed = await wireviz_component.generate_from_yaml(yaml_content=changed_yaml)
 
-            mock_subprocess.return_value.returncode = 0
-            mock_subprocess.return_value.stderr = ""
+        expected_dir = temp_dir / f"wireviz_{digest[:12]}"
+        assert result.annotations["paths"]["directory"] == str(expected_dir)
+        assert changed.annotations["paths"]["directory"] == str(temp_dir / f"wireviz_{changed_digest[:12]}")
+        assert expected_dir.exists()
+        assert fake_render.call_count == 2
 
-            # Mock datetime to return specific timestamp
-            with patch('datetime.datetime') as mock_datetime:
-                mock_datetime.now.return_value.strftime.return_value = "20240515_143022"
+    @pytest.mark.asyncio
+    async def test_generate_from_yaml_reuses_existing_hash_directory(self, wireviz_component, temp_dir, sample_yaml_content, mock_png_image, fake_render):
+        """Test an existing content-hash directory with a PNG skips rendering"""
+        wireviz_component.sketches_base_dir = temp_dir
+        digest = hashlib.blake2b(sample_yaml_content.encode(), digest_size=16).hexdigest()
+        output_dir = temp_dir / f"wireviz_{digest[:12]}"
+        output_dir.mkdir()
+        png_file = output_dir / "circuit.png"
+        png_file.write_bytes(mock_png_image)
+        os.utime(output_dir, (1000, 1000))
+
+        with patch.object(wireviz_component, '_open_file'), \
+             patch.object(wireviz_component, '_prune_output_dirs') as mock_prune:
+            result = await wireviz_component.generate_from_yaml(yaml_content=sample_yaml_content)
+
+        fake_render.assert_not_called()
+        mock_prune.assert_not_called()
+        assert result.path == png_file
+        # Marked as recently used so pruning keeps it
+        assert output_dir.stat().st_mtime > 1000
+
+    def test_prune_output_dirs_keeps_limit_and_legacy_dirs(self, wireviz_component, temp_dir):
+        """Test pruning drops the oldest hash dirs and leaves timestamped dirs alone"""
+        wireviz_component.sketches_base_dir = temp_dir
+        legacy_dir = temp_dir / "wireviz_20240101_120000"
+        legacy_dir.mkdir()
+        os.utime(legacy_dir, (1, 1))
+        hash_dirs = [temp_dir / f"wireviz_{i:012x}" for i in range(4)]
+        for i, hash_dir in enumerate(hash_dirs):
+            hash_dir.mkdir()
+            (hash_dir / "circuit.png").write_bytes(b"png")
+            os.utime(hash_dir, (1000 + i, 1000 + i))
 
-                # Pre-create the expected output directory and PNG file
-                expected_dir = temp_dir / "wireviz_20240515_143022"
-                expected_dir.mkdir(parents=True, exist_ok=True)
-                png_file = expected_dir / "circuit.png"
-                png_file.write_bytes(mock_png_image)
+        with patch.object(wireviz_module, '_OUTPUT_DIR_LIMIT', 2):
+            wireviz_component._prune_output_dirs()
 
-                result = await wireviz_component.generate_from_yaml(
-                    yaml_content=sample_yaml_content
-                )
-
-        assert result["success"] is True
-        assert "wireviz_20240515_143022" in result["paths"]["directory"]
-        assert expected_dir.exists()
+        assert [d.exists() for d in hash_dirs] == [False, False, True, True]
+        assert legacy_dir.exists()
 
     @pytest.mark.asyncio
     async def test_generate_from_description_exception_handling(self, wireviz_component, test_context):
@@ -511,35 +545,157 @@ connectors:
         assert "Sampling error" in result["error"]
 
     @pytest.mark.asyncio
-    async def test_yaml_content_persistence(self, wireviz_component, temp_dir, sample_yaml_content, mock_png_image):
+    async def test_yaml_content_persistence(self, wireviz_component, temp_dir, sample_yaml_content, fake_render):
         """Test that YAML content is written to file correctly"""
         wireviz_component.sketches_base_dir = temp_dir
+        digest = hashlib.blake2b(sample_yaml_content.encode(), digest_size=16).hexdigest()
 
-        with patch('subprocess.run') as mock_subprocess, \
-             patch('datetime.datetime') as mock_datetime, \
-             patch.object(wireviz_component, '_open_file'):
-
-            mock_subprocess.return_value.returncode = 0
-            mock_subprocess.return_value.stderr = ""
-            mock_datetime.now.return_value.strftime.return_value = "20240101_120000"
-
-            # Pre-create output directory and PNG file
-            output_dir = temp_dir / "wireviz_20240101_120000"
-            output_dir.mkdir(parents=True, exist_ok=True)
-            png_file = output_dir / "test_circuit.png"
-            png_file.write_bytes(mock_png_image)
-
+        with patch.object(wireviz_component, '_open_file'):
             result = await wireviz_component.generate_from_yaml(
                 yaml_content=sample_yaml_content,
                 output_base="test_circuit"
             )
 
         # Verify YAML was written to file
-        yaml_file = output_dir / "test_circuit.yaml"
+        yaml_file = temp_dir / f"wireviz_{digest[:12]}" / "test_circuit.yaml"
         assert yaml_file.exists()
-        written_content = yaml_file.read_text()
-        assert "connectors:" in written_content
-        assert "Arduino:" in written_content
-        assert "LED:" in written_content
+        assert yaml_file.read_text() == sample_yaml_content
 
-        assert result["success"] is True
+        assert result.annotations["paths"]["yaml"] == str(yaml_file)
+
+    @pytest.fixture
+    def fake_wireviz(self, mock_png_image):
+        """Stand in for the bundled wireviz package with a mocked parse()"""
+        def parse(yaml_content, output_formats, output_dir, output_name, image_paths):
+            api.render_threads.append(threading.current_thread().name)
+            print("rendering")  # WireViz progress output must not reach stdout
+            (output_dir / f"{output_name}.png").write_bytes(mock_png_image)
+
+        api = types.ModuleType("wireviz.wireviz")
+        api.render_threads = []
+        api.parse = Mock(side_effect=parse)
+        package = types.ModuleType("wireviz")
+        package.wireviz = api
+        with patch.dict(sys.modules, {"wireviz": package, "wireviz.wireviz": api}):
+            yield api
+
+    @pytest.mark.asyncio
+    async def test_generate_from_yaml_renders_in_process(self, wireviz_component, temp_dir, sample_yaml_content, fake_wireviz, capsys):
+        """Test the bundled wireviz package renders on the dedicated render thread"""
+        wireviz_component.sketches_base_dir = temp_dir
+
+        with patch.object(wireviz_component, '_open_file'), \
+             patch('asyncio.create_subprocess_exec') as mock_exec:
+            result = await wireviz_component.generate_from_yaml(
+                yaml_content=sample_yaml_content
+            )
+
+        mock_exec.assert_not_called()
+        fake_wireviz.parse.assert_called_once()
+        args, kwargs = fake_wireviz.parse.call_args
+        assert args[0] == sample_yaml_content
+        assert kwargs["output_formats"] == ("png",)
+        assert kwargs["output_name"] == "circuit"
+        assert fake_wireviz.render_threads[0].startswith("wireviz-render")
+
+        assert result.path.exists()
+        captured = capsys.readouterr()
+        assert "rendering" not in captured.out
+        assert "rendering" in captured.err
+
+    @pytest.mark.asyncio
+    async def test_in_process_timeout_fails_fast_while_render_is_stuck(self, wireviz_component, test_config, temp_dir, sample_yaml_content, fake_wireviz):
+        """Test a render that outlives its timeout makes later renders fail fast"""
+        wireviz_component.sketches_base_dir = temp_dir
+        wireviz_component.config = test_config.model_copy(update={"command_timeout": 0.05})
+        release = threading.Event()
+        fake_wireviz.parse.side_effect = lambda *args, **kwargs: release.wait(5)
+
+        try:
+            with patch.object(wireviz_component, '_open_file'):
+                first = await wireviz_component.generate_from_yaml(
+                    yaml_content=sample_yaml_content
+                )
+                second = await wireviz_component.generate_from_yaml(
+                    yaml_content=sample_yaml_content + "\n# changed"
+                )
+        finally:
+            release.set()
+            wireviz_module._stuck_render.result(timeout=5)
+
+        assert "timed out" in first.text
+        assert "busy" in second.text
+        assert fake_wireviz.parse.call_count == 1
+
+    @pytest.fixture
+    def fake_render(self, wireviz_component, mock_png_image):
+        """Patch _run_wireviz with a render that writes the PNG and succeeds"""
+        async def render(yaml_path, output_dir, yaml_content):
+            await asyncio.sleep(0)  # Let concurrent calls interleave
+            (output_dir / f"{yaml_path.stem}.png").write_bytes(mock_png_image)
+
+        with patch.object(wireviz_component, '_run_wireviz', side_effect=render) as mock_run:
+            yield mock_run
+
+    @pytest.mark.asyncio
+    async def test_generate_from_yaml_memory_cache_hit(self, wireviz_component, temp_dir, sample_yaml_content, fake_render):
+        """Test repeated YAML is served from the in-memory cache without rendering"""
+        wireviz_component.sketches_base_dir = temp_dir
+
+        with patch.object(wireviz_component, '_open_file'):
+            first = await wireviz_component.generate_from_yaml(yaml_content=sample_yaml_content)
+            with patch.object(wireviz_component, '_prune_output_dirs') as mock_prune:
+                second = await wireviz_component.generate_from_yaml(yaml_content=sample_yaml_content)
+
+        fake_render.assert_called_once()
+        mock_prune.assert_not_called()
+        assert second.path == first.path
+
+    @pytest.mark.asyncio
+    async def test_generate_from_yaml_disk_cache_hit(self, wireviz_component, temp_dir, sample_yaml_content, mock_png_image, fake_render):
+        """Test a PNG in .wireviz_cache is linked into the output directory"""
+        wireviz_component.sketches_base_dir = temp_dir
+        digest = hashlib.blake2b(sample_yaml_content.encode(), digest_size=16).hexdigest()
+        cached_png = temp_dir / ".wireviz_cache" / f"{digest}.png"
+        cached_png.parent.mkdir()
+        cached_png.write_bytes(mock_png_image)
+
+        with patch.object(wireviz_component, '_open_file'):
+            result = await wireviz_component.generate_from_yaml(yaml_content=sample_yaml_content)
+
+        fake_render.assert_not_called()
+        assert result.path == temp_dir / f"wireviz_{digest[:12]}" / "circuit.png"
+        assert result.path.read_bytes() == mock_png_image
+
+    @pytest.mark.asyncio
+    async def test_generate_from_yaml_concurrent_identical_yaml_renders_once(self, wireviz_component, temp_dir, sample_yaml_content, fake_render):
+        """Test concurrent calls with identical YAML don't render into the same directory twice"""
+        wireviz_component.sketches_base_dir = temp_dir
+
+        with patch.object(wireviz_component, '_open_file'):
+            results = await asyncio.gather(*(
+                wireviz_component.generate_from_yaml(yaml_content=sample_yaml_content)
+                for _ in range(3)
+            ))
+
+        fake_render.assert_called_once()
+        assert len({r.path for r in results}) == 1
+        assert not wireviz_component._digest_locks
+
+    def test_store_cached_png_evicts_least_recently_used(self, wireviz_component, temp_dir, mock_png_image):
+        """Test the disk cache keeps only the newest _DISK_CACHE_SIZE PNGs"""
+        wireviz_component.sketches_base_dir = temp_dir
+        cache_dir = temp_dir / ".wireviz_cache"
+        png_path = temp_dir / "fresh.png"
+        png_path.write_bytes(mock_png_image)
+
+        with patch.object(wireviz_module, '_DISK_CACHE_SIZE', 2):
+            cache_dir.mkdir()
+            for i, name in enumerate(["old", "mid"]):
+                cached = cache_dir / f"{name}.png"
+                cached.write_bytes(mock_png_image)
+                os.utime(cached, (1000 + i, 1000 + i))
+
+            wireviz_component._store_cached_png(png_path, cache_dir / "new.png")
+
+        assert sorted(p.name for p in cache_dir.iterdir()) == ["mid.png", "new.png"]